@@ -0,0 +1,231 @@
+# batch_movegen.py
+# Move generation for many independent positions at once. Positions are the N x 4 uint32
+# rows of position_format (dark, light, kings, side with 0 dark / 1 light), and every
+# step below is one NumPy shift-and-mask over the whole batch, using the same STEPS
+# tables as BitboardRulesEngine, so the rules are identical: mandatory capture, only
+# maximal jump paths, jumped pieces and the mover's own start square stay occupied until
+# the move is over, men crown on the far row.
+#
+# Moves are N' x 3 uint32 rows (source bit, destination bit, captured mask) with a
+# parallel array saying which position each one belongs to. Jump paths are not kept:
+# apply_moves only needs the two ends and what was captured.
+import argparse
+import random
+import time
+
+from bitboard import DARK_START, FULL_MASK, LIGHT_START, PROMOTION_MASK
+from pieces import DARK, LIGHT, opponent
+from rules_engine import ALL_DIRECTIONS, STEPS, BitboardRulesEngine
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+UP_DIRECTIONS = ALL_DIRECTIONS[:2]
+if np is not None:
+    BYTE_COUNTS = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.intp)
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("batch_movegen needs NumPy")
+
+
+def _step(mask, direction):
+    (mask_a, shift_a), (mask_b, shift_b) = STEPS[direction]
+    if shift_a > 0:
+        return (mask & np.uint32(mask_a)) << np.uint32(shift_a) | (mask & np.uint32(mask_b)) << np.uint32(shift_b)
+    return (mask & np.uint32(mask_a)) >> np.uint32(-shift_a) | (mask & np.uint32(mask_b)) >> np.uint32(-shift_b)
+
+
+def _back(direction):
+    # UP_LEFT <-> DOWN_RIGHT, UP_RIGHT <-> DOWN_LEFT
+    return 3 - direction
+
+
+def _bits(mask):
+    """Splits a uint32 array into (position index, single-bit mask) pairs, one per set bit."""
+    table = np.unpackbits(np.ascontiguousarray(mask, dtype='<u4').view(np.uint8).reshape(-1, 4),
+                          axis=1, bitorder='little')
+    boards, squares = np.nonzero(table)
+    return boards, np.left_shift(np.uint32(1), squares.astype(np.uint32))
+
+
+def popcount(mask):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(mask).astype(np.intp)
+    counts = np.zeros(mask.shape, dtype=np.intp)
+    for shift in range(0, 32, 8):
+        counts += BYTE_COUNTS[(mask >> np.uint32(shift)) & np.uint32(0xFF)]
+    return counts
+
+
+def _sides(positions):
+    positions = np.asarray(positions, dtype=np.uint32)
+    dark, light, kings, side = positions.T
+    light_to_move = side == LIGHT
+    own = np.where(light_to_move, light, dark)
+    enemy = np.where(light_to_move, dark, light)
+    empty = ~(dark | light)
+    # Light men go up, dark men go down, kings both ways.
+    movers = {
+        direction: own & np.where(light_to_move == (direction in UP_DIRECTIONS), np.uint32(FULL_MASK), kings)
+        for direction in ALL_DIRECTIONS
+    }
+    return own, enemy, empty, kings, movers
+
+
+def move_masks(positions):
+    """
+    Returns (masks, captures): masks is N x 4, per direction the pieces that can start a
+    legal move that way (jumps when a capture exists, steps otherwise); captures says
+    which positions have a capture.
+    """
+    _require_numpy()
+    own, enemy, empty, kings, movers = _sides(positions)
+    jumps = np.stack([_step(_step(movers[d], d) & enemy, d) & empty for d in ALL_DIRECTIONS], axis=1)
+    steps = np.stack([_step(movers[d], d) & empty for d in ALL_DIRECTIONS], axis=1)
+    jumps = np.stack([_step(_step(jumps[:, d], _back(d)), _back(d)) for d in ALL_DIRECTIONS], axis=1)
+    steps = np.stack([_step(steps[:, d], _back(d)) for d in ALL_DIRECTIONS], axis=1)
+    captures = jumps.any(axis=1)
+    return np.where(captures[:, None], jumps, steps), captures
+
+
+def _expand_jumps(enemy, empty, kings, movers, light_to_move):
+    # Breadth-first over partial jump paths of every position at once; a path that cannot
+    # be extended in any direction is one legal move.
+    boards, origins, heres, captured = [], [], [], []
+    for direction in ALL_DIRECTIONS:
+        landing = _step(_step(movers[direction], direction) & enemy, direction) & empty
+        board, here = _bits(landing)
+        boards.append(board)
+        heres.append(here)
+        captured.append(_step(here, _back(direction)))
+        origins.append(_step(captured[-1], _back(direction)))
+    board, origin, here, taken = (np.concatenate(part) for part in (boards, origins, heres, captured))
+
+    found = []
+    while board.size:
+        is_king = (kings[board] & origin) != 0
+        goes_up = is_king | light_to_move[board]
+        goes_down = is_king | ~light_to_move[board]
+        extended = np.zeros(board.size, dtype=bool)
+        next_states = []
+        for direction in ALL_DIRECTIONS:
+            allowed = goes_up if direction in UP_DIRECTIONS else goes_down
+            jumped = _step(here, direction) & enemy[board] & ~taken
+            landing = _step(jumped, direction) & empty[board]
+            hit = allowed & (landing != 0)
+            extended |= hit
+            next_states.append((board[hit], origin[hit], landing[hit], taken[hit] | jumped[hit]))
+        done = ~extended
+        found.append((board[done], origin[done], here[done], taken[done]))
+        board, origin, here, taken = (np.concatenate(part) for part in zip(*next_states))
+    if not found:
+        return np.zeros(0, np.intp), np.zeros(0, np.uint32), np.zeros(0, np.uint32), np.zeros(0, np.uint32)
+    return [np.concatenate(part) for part in zip(*found)]
+
+
+def generate_moves(positions):
+    """Returns (boards, moves): moves is N' x 3 uint32, boards[i] the position moves[i] belongs to."""
+    _require_numpy()
+    positions = np.asarray(positions, dtype=np.uint32)
+    own, enemy, empty, kings, movers = _sides(positions)
+    light_to_move = positions[:, 3] == LIGHT
+    board, origin, here, taken = _expand_jumps(enemy, empty, kings, movers, light_to_move)
+
+    has_capture = np.zeros(len(positions), dtype=bool)
+    has_capture[board] = True
+    boards, moves = [board], [np.stack([origin, here, taken], axis=1)]
+    for direction in ALL_DIRECTIONS:
+        targets = np.where(has_capture, np.uint32(0), _step(movers[direction], direction) & empty)
+        step_board, dst = _bits(targets)
+        boards.append(step_board)
+        moves.append(np.stack([_step(dst, _back(direction)), dst, np.zeros_like(dst)], axis=1))
+    return np.concatenate(boards), np.concatenate(moves).astype(np.uint32)
+
+
+def count_moves(positions):
+    """Number of legal moves of every position, as an intp array."""
+    _require_numpy()
+    positions = np.asarray(positions, dtype=np.uint32)
+    own, enemy, empty, kings, movers = _sides(positions)
+    light_to_move = positions[:, 3] == LIGHT
+    board = _expand_jumps(enemy, empty, kings, movers, light_to_move)[0]
+    counts = np.bincount(board, minlength=len(positions))
+    steps = sum(popcount(_step(movers[direction], direction) & empty) for direction in ALL_DIRECTIONS)
+    return np.where(counts > 0, counts, steps)
+
+
+def apply_moves(positions, moves):
+    """Plays moves[i] in positions[i] and returns the resulting positions, side flipped."""
+    _require_numpy()
+    positions = np.asarray(positions, dtype=np.uint32)
+    dark, light, kings, side = positions.T
+    src, dst, taken = np.asarray(moves, dtype=np.uint32).T
+    light_to_move = side == LIGHT
+    moved = src | dst
+    promotion = np.where(light_to_move, np.uint32(PROMOTION_MASK['light']), np.uint32(PROMOTION_MASK['dark']))
+    crowned = ((kings & src) != 0) | ((dst & promotion) != 0)
+    new_kings = (kings & ~src & ~taken) | np.where(crowned, dst, np.uint32(0))
+    new_dark = np.where(light_to_move, dark & ~taken, dark ^ moved)
+    new_light = np.where(light_to_move, light ^ moved, light & ~taken)
+    new_side = np.where(light_to_move, np.uint32(DARK), np.uint32(LIGHT))
+    return np.stack([new_dark, new_light, new_kings, new_side], axis=1)
+
+
+def sample_positions(count, seed=0, max_plies=120, rules_engine=None):
+    """count positions from random games, as an N x 4 uint32 array."""
+    _require_numpy()
+    rules_engine = rules_engine or BitboardRulesEngine()
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        dark, light, kings, color = DARK_START, LIGHT_START, 0, 'light'
+        for _ in range(max_plies):
+            moves = rules_engine.generate_moves(dark, light, kings, color)
+            if not moves or len(positions) >= count:
+                break
+            positions.append((dark, light, kings, LIGHT if color == 'light' else DARK))
+            dark, light, kings = rules_engine.apply_move(dark, light, kings, color, rng.choice(moves))
+            color = opponent(color)
+    return np.array(positions, dtype=np.uint32)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batched move generation throughput")
+    parser.add_argument('--positions', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    positions = sample_positions(args.positions, args.seed)
+    rules_engine = BitboardRulesEngine()
+    colors = ['light' if side == LIGHT else 'dark' for side in positions[:, 3]]
+    rows = [(int(dark), int(light), int(kings)) for dark, light, kings, _ in positions]
+
+    started = time.perf_counter()
+    scalar = [len(rules_engine.generate_moves(*row, color)) for row, color in zip(rows, colors)]
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    counts = count_moves(positions)
+    count_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    boards, moves = generate_moves(positions)
+    children = apply_moves(positions[boards], moves)
+    generate_seconds = time.perf_counter() - started
+
+    if counts.tolist() != scalar or len(moves) != sum(scalar):
+        raise SystemExit("batch move counts disagree with BitboardRulesEngine")
+    n = len(positions)
+    print(f"{n} positions, {sum(scalar)} moves")
+    print(f"scalar generate_moves     {scalar_seconds:8.3f}s {n / scalar_seconds:12.0f} positions/s")
+    print(f"batch count_moves         {count_seconds:8.3f}s {n / count_seconds:12.0f} positions/s")
+    print(f"batch generate + apply    {generate_seconds:8.3f}s {n / generate_seconds:12.0f} positions/s"
+          f" ({len(children)} children)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+# bitboard.py
+# The 32 playable squares are numbered 0..31 row by row from the top of the board:
+# square 0 is (0, 1), square 4 is (1, 0), square 31 is (7, 6).
+from move_tables import JUMPS
+from evaluation import SQUARE_WEIGHTS, score_masks
+from geometry import STANDARD
+from pieces import piece_type
+from zobrist import PIECE_KEYS, SIDE_KEY, hash_masks
+
+NUM_SQUARES = 32
+FULL_MASK = 0xFFFFFFFF
+DARK_START = 0x00000FFF  # rows 0-2
+LIGHT_START = 0xFFF00000  # rows 5-7
+PROMOTION_MASK = {'dark': 0xF0000000, 'light': 0x0000000F}
+
+
+def square_index(pos):
+    row, col = pos
+    return row * 4 + col // 2
+
+
+def square_pos(sq):
+    row = sq >> 2
+    return (row, 2 * (sq & 3) + 1 - (row & 1))
+
+
+def is_playable(pos):
+    row, col = pos
+    return 0 <= row < 8 and 0 <= col < 8 and (row + col) % 2 == 1
+
+
+SQUARE_POS = [square_pos(sq) for sq in range(NUM_SQUARES)]
+
+# (src << 5) | dst -> square jumped over, for every two-step diagonal on the board
+JUMPED_SQUARE = {
+    (square_index(pos) << 5) | square_index(land): square_index(mid)
+    for pos, hops in JUMPS[('dark', True)].items() for mid, land in hops
+}
+
+
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def board_masks(board):
+    """Returns (dark, light, kings) for any board exposing get_piece_at."""
+    if hasattr(board, 'masks'):
+        return board.masks()
+    dark = light = kings = 0
+    for sq, pos in enumerate(SQUARE_POS):
+        piece = board.get_piece_at(pos)
+        if piece is None:
+            continue
+        bit = 1 << sq
+        if piece.color == 'dark':
+            dark |= bit
+        else:
+            light |= bit
+        if piece.is_king:
+            kings |= bit
+    return dark, light, kings
+
+
+class BitBoard:
+    """
+    Drop-in replacement for Board that stores the position as three 32-bit masks.
+    Piece objects are only created when somebody asks for one through get_piece_at,
+    and are then kept so that the same square keeps returning the same object.
+    """
+    geometry = STANDARD  # masks are 32 bits, so always 8x8
+
+    def __init__(self, rules_engine, piece_factory):
+        self.highlight_positions = []
+        self.rules_engine = rules_engine
+        self.piece_factory = piece_factory
+        self.undo_stack = []
+        self.setup_board()
+
+    def setup_board(self):
+        self.set_position(DARK_START, LIGHT_START, 0)
+
+    def set_position(self, dark, light, kings, color='light'):
+        self.dark, self.light, self.kings = dark, light, kings
+        self._pieces = {}  # square -> materialised Piece
+        self.undo_stack = []
+        self.hash_key = hash_masks(dark, light, kings, color)
+        self.score = score_masks(dark, light, kings)
+        self._legal_moves = None  # (hash_key, color, moves) for the current position
+
+    def masks(self):
+        return self.dark, self.light, self.kings
+
+    @property
+    def grid(self):
+        # A read-only picture of the board for display: occupied squares hold the shared
+        # PieceType flyweights (color, is_king), so drawing the board creates no Pieces.
+        return [[self.piece_type_at(row * 4 + col // 2) if (row + col) % 2 else None for col in range(8)]
+                for row in range(8)]
+
+    def get_piece_at(self, pos):
+        row, col = pos
+        if (row + col) % 2 == 0:
+            return None
+        sq = row * 4 + col // 2
+        piece = self._pieces.get(sq)
+        if piece is not None:
+            return piece
+        bit = 1 << sq
+        if self.dark & bit:
+            color = 'dark'
+        elif self.light & bit:
+            color = 'light'
+        else:
+            return None
+        kind = 'king' if self.kings & bit else 'man'
+        piece = self.piece_factory.create_piece(color, kind, (row, col))
+        self._pieces[sq] = piece
+        return piece
+
+    def get_pieces(self, color):
+        mask = self.dark if color == 'dark' else self.light
+        return [self.get_piece_at(SQUARE_POS[sq]) for sq in iter_bits(mask)]
+
+    def piece_count(self):
+        return (self.dark | self.light).bit_count()
+
+    def get_legal_moves(self, color):
+        # Same per-position cache as Board.get_legal_moves.
+        cached = self._legal_moves
+        if cached is not None and cached[0] == self.hash_key and cached[1] == color:
+            return cached[2]
+        moves = self.rules_engine.get_legal_moves(self, color)
+        self._legal_moves = (self.hash_key, color, moves)
+        return moves
+
+    def move_piece(self, piece, dest):
+        self._legal_moves = None
+        start_row, start_col = piece.position
+        end_row, end_col = dest
+        src = square_index(piece.position)
+        dst = square_index(dest)
+        self._move_bits(src, dst)
+        self._pieces.pop(src, None)
+        piece.position = (end_row, end_col)
+        self._pieces[dst] = piece
+
+        if self.rules_engine.is_promotion_move(self, piece, dest) and not piece.is_king:
+            piece.make_king()
+            self.kings |= 1 << dst
+            self.hash_key ^= PIECE_KEYS[(piece.color, False)][dst] ^ PIECE_KEYS[(piece.color, True)][dst]
+            self.score += SQUARE_WEIGHTS[(piece.color, True)][dst] - SQUARE_WEIGHTS[(piece.color, False)][dst]
+
+        if abs(end_row - start_row) == 2:
+            self._remove(JUMPED_SQUARE[(src << 5) | dst])
+            return True
+        return False
+
+    def switch_side(self):
+        self.hash_key ^= SIDE_KEY
+
+    def make_move(self, move):
+        start, path = move
+        self.make_square_move(square_index(start), [square_index(pos) for pos in path])
+
+    def unmake_move(self):
+        (self.dark, self.light, self.kings, self.hash_key, self.score,
+         src, dst, captured, promoted) = self.undo_stack.pop()
+        self._legal_moves = None
+        piece = self._pieces.pop(dst, None)
+        if piece is not None:
+            piece.position = SQUARE_POS[src]
+            if promoted:
+                piece.unmake_king()
+            self._pieces[src] = piece
+        for sq, captured_piece in captured:
+            self._pieces[sq] = captured_piece
+
+    # Fast path: works on square numbers and never touches Piece objects
+    # other than keeping already materialised ones in sync.
+
+    def color_at(self, sq):
+        bit = 1 << sq
+        if self.dark & bit:
+            return 'dark'
+        if self.light & bit:
+            return 'light'
+        return None
+
+    def is_king_at(self, sq):
+        return bool(self.kings & (1 << sq))
+
+    def piece_type_at(self, sq):
+        # The shared PieceType flyweight for a square, without creating a Piece.
+        color = self.color_at(sq)
+        return None if color is None else piece_type(color, self.is_king_at(sq))
+
+    def move_square(self, src, dst):
+        self._legal_moves = None
+        color = self._move_bits(src, dst)
+        dst_bit = 1 << dst
+        promoted = not self.kings & dst_bit and PROMOTION_MASK[color] & dst_bit
+        if promoted:
+            self.kings |= dst_bit
+            self.hash_key ^= PIECE_KEYS[(color, False)][dst] ^ PIECE_KEYS[(color, True)][dst]
+            self.score += SQUARE_WEIGHTS[(color, True)][dst] - SQUARE_WEIGHTS[(color, False)][dst]
+        piece = self._pieces.pop(src, None)
+        if piece is not None:
+            piece.position = SQUARE_POS[dst]
+            if promoted:
+                piece.make_king()
+            self._pieces[dst] = piece
+
+        jumped = JUMPED_SQUARE.get((src << 5) | dst)
+        if jumped is not None:
+            self._remove(jumped)
+            return True
+        return False
+
+    def make_square_move(self, src, path):
+        # The undo record is the three masks (and hash and score) from before the move
+        # plus whatever materialised pieces have to be put back.
+        dark, light, kings, hash_key, score = self.dark, self.light, self.kings, self.hash_key, self.score
+        captured = []
+        sq = src
+        for dst in path:
+            jumped = JUMPED_SQUARE.get((sq << 5) | dst)
+            if jumped in self._pieces:
+                captured.append((jumped, self._pieces[jumped]))
+            self.move_square(sq, dst)
+            sq = dst
+        promoted = not kings >> src & 1 and self.kings >> sq & 1
+        self.hash_key ^= SIDE_KEY
+        self.undo_stack.append((dark, light, kings, hash_key, score, src, sq, captured, promoted))
+
+    def _move_bits(self, src, dst):
+        src_bit = 1 << src
+        move = src_bit | (1 << dst)
+        is_king = bool(self.kings & src_bit)
+        if is_king:
+            self.kings ^= move
+        color = 'dark' if self.dark & src_bit else 'light'
+        if color == 'dark':
+            self.dark ^= move
+        else:
+            self.light ^= move
+        keys = PIECE_KEYS[(color, is_king)]
+        self.hash_key ^= keys[src] ^ keys[dst]
+        weights = SQUARE_WEIGHTS[(color, is_king)]
+        self.score += weights[dst] - weights[src]
+        return color
+
+    def _remove(self, sq):
+        kind = (self.color_at(sq), self.is_king_at(sq))
+        self.hash_key ^= PIECE_KEYS[kind][sq]
+        self.score -= SQUARE_WEIGHTS[kind][sq]
+        keep = ~(1 << sq)
+        self.dark &= keep
+        self.light &= keep
+        self.kings &= keep
+        self._pieces.pop(sq, None)
+
+    def in_bounds(self, pos):
+        r, c = pos
+        return 0 <= r < 8 and 0 <= c < 8
@@ -1,57 +1,192 @@
 # board.py
 # Remove: from pieces import Man
+from bitboard import iter_bits
+from geometry import STANDARD
+from move_tables import between
+from zobrist import SIDE_KEY
 
 class Board:
-    def __init__(self, rules_engine, piece_factory): # Dependencies are injected!
-        self.grid = [[None for _ in range(8)] for _ in range(8)]
+    def __init__(self, rules_engine, piece_factory, geometry=STANDARD): # Dependencies are injected!
+        self.geometry = geometry
+        # The geometry's tables, kept at hand for move_piece.
+        self.square_numbers = geometry.square_numbers
+        self.piece_keys = geometry.piece_keys
+        self.square_weights = geometry.square_weights
+        self.grid = [[None for _ in range(geometry.size)] for _ in range(geometry.size)]
         self.highlight_positions = []
         self.rules_engine = rules_engine
         self.piece_factory = piece_factory
+        self.undo_stack = []
+        self.hash_key = 0  # Zobrist key, kept up to date by every change to the position
+        self.score = 0  # evaluation sum, dark's point of view, kept up to date the same way
+        self.pieces_by_color = {'dark': {}, 'light': {}}  # color -> {position: piece}, live pieces only
+        # Square masks as BitBoard keeps them, so board_masks and BitboardRulesEngine can
+        # read the position without scanning the grid.
+        self.dark = self.light = self.kings = 0
+        self._legal_moves = None  # (hash_key, color, moves) for the current position
         self.setup_board()
 
     def setup_board(self):
         # Use the factory to create pieces, don't hardcode 'Man'
-        for row in range(3):
-            for col in range(8):
-                if (row + col) % 2 == 1:
-                    # The factory decides what type of piece to create
-                    piece = self.piece_factory.create_piece('dark', 'man', (row, col))
-                    self.grid[row][col] = piece
-        for row in range(5, 8):
-            for col in range(8):
-                if (row + col) % 2 == 1:
-                    piece = self.piece_factory.create_piece('light', 'man', (row, col))
-                    self.grid[row][col] = piece
+        for color in ('dark', 'light'):
+            for row, col in self.geometry.start_squares(color):
+                # The factory decides what type of piece to create
+                piece = self.piece_factory.create_piece(color, 'man', (row, col))
+                self.grid[row][col] = piece
+                self.pieces_by_color[color][(row, col)] = piece
+                sq = self.square_numbers[(row, col)]
+                self.hash_key ^= self.piece_keys[(color, False)][sq]
+                self.score += self.square_weights[(color, False)][sq]
+                if color == 'dark':
+                    self.dark |= 1 << sq
+                else:
+                    self.light |= 1 << sq
+
+    def set_position(self, dark, light, kings, color='light'):
+        # Replaces the whole position with the one described by square masks, bits numbered as in geometry.py.
+        size = self.geometry.size
+        self.grid = [[None for _ in range(size)] for _ in range(size)]
+        self.pieces_by_color = {'dark': {}, 'light': {}}
+        self.undo_stack = []
+        self._legal_moves = None
+        self.hash_key = SIDE_KEY if color == 'dark' else 0
+        self.score = 0
+        self.dark, self.light, self.kings = dark, light, kings
+        for piece_color, mask in (('dark', dark), ('light', light)):
+            for sq in iter_bits(mask):
+                is_king = bool(kings >> sq & 1)
+                row, col = self.geometry.squares[sq]
+                piece = self.piece_factory.create_piece(piece_color, 'king' if is_king else 'man', (row, col))
+                self.grid[row][col] = piece
+                self.pieces_by_color[piece_color][(row, col)] = piece
+                self.hash_key ^= self.piece_keys[(piece_color, is_king)][sq]
+                self.score += self.square_weights[(piece_color, is_king)][sq]
+
+    def masks(self):
+        return self.dark, self.light, self.kings
 
     def get_piece_at(self, pos):
         row, col = pos
         return self.grid[row][col]
 
+    def get_pieces(self, color):
+        return self.pieces_by_color[color].values()
+
+    def piece_count(self):
+        return len(self.pieces_by_color['dark']) + len(self.pieces_by_color['light'])
+
+    def get_legal_moves(self, color):
+        """
+        The rules engine's legal (start, path) moves, worked out once per position and
+        handed to every caller until the board changes. Callers must not modify the list.
+        """
+        cached = self._legal_moves
+        if cached is not None and cached[0] == self.hash_key and cached[1] == color:
+            return cached[2]
+        moves = self.rules_engine.get_legal_moves(self, color)
+        self._legal_moves = (self.hash_key, color, moves)
+        return moves
+
     def move_piece(self, piece, dest):
-        start_row, start_col = piece.position
+        self._legal_moves = None
+        start = piece.position
+        start_row, start_col = start
         end_row, end_col = dest
+        square_numbers, piece_keys, square_weights = self.square_numbers, self.piece_keys, self.square_weights
+        # Delegate the promotion check to the rules engine, before the piece has left its square
+        crowned = self.rules_engine.is_promotion_move(self, piece, dest)
         self.grid[start_row][start_col] = None
         piece.position = (end_row, end_col)
         self.grid[end_row][end_col] = piece
-
-        # Delegate the promotion check to the rules engine
-        if self.rules_engine.is_promotion_move(self, piece, dest):
+        own_pieces = self.pieces_by_color[piece.color]
+        del own_pieces[start]
+        own_pieces[piece.position] = piece
+        src, dst = square_numbers[start], square_numbers[dest]
+        self.hash_key ^= piece_keys[(piece.color, piece.is_king)][src]
+        self.score -= square_weights[(piece.color, piece.is_king)][src]
+        moved = 1 << src | 1 << dst
+        if piece.color == 'dark':
+            self.dark ^= moved
+        else:
+            self.light ^= moved
+        if piece.is_king:
+            self.kings ^= moved
+        elif crowned:
             piece.make_king()
+            self.kings |= 1 << dst
+        self.hash_key ^= piece_keys[(piece.color, piece.is_king)][dst]
+        self.score += square_weights[(piece.color, piece.is_king)][dst]
 
         # Check for capture
-        if abs(end_row - start_row) == 2:
-            mid_row = (start_row + end_row) // 2
-            mid_col = (start_col + end_col) // 2
-            self.grid[mid_row][mid_col] = None
+        if abs(end_row - start_row) > 1:
+            jumped = self.jumped_square(start, dest)
+            if jumped is None:  # a king's long move over empty squares
+                return False
+            captured = self.grid[jumped[0]][jumped[1]]
+            self.grid[jumped[0]][jumped[1]] = None
+            del self.pieces_by_color[captured.color][jumped]
+            sq = square_numbers[jumped]
+            self.hash_key ^= piece_keys[(captured.color, captured.is_king)][sq]
+            self.score -= square_weights[(captured.color, captured.is_king)][sq]
+            keep = ~(1 << sq)
+            self.dark &= keep
+            self.light &= keep
+            self.kings &= keep
             return True
         return False
 
+    def jumped_square(self, start, dest):
+        """The occupied square a move from start to dest passes over, or None."""
+        for row, col in between(start, dest):
+            if self.grid[row][col] is not None:
+                return row, col
+        return None
+
+    def switch_side(self):
+        self.hash_key ^= SIDE_KEY
+
+    def make_move(self, move):
+        """
+        Plays a whole (start, path) move and remembers just enough to take it back:
+        the piece, where it started, every (square, piece) it jumped and whether it was crowned.
+        The turn passes to the other side, so the side-to-move key is switched too.
+        """
+        start, path = move
+        hash_key, score, masks = self.hash_key, self.score, (self.dark, self.light, self.kings)
+        piece = self.get_piece_at(start)
+        was_king = piece.is_king
+        captured = []
+        for dest in path:
+            if abs(dest[0] - piece.position[0]) > 1:
+                jumped = self.jumped_square(piece.position, dest)
+                if jumped is not None:
+                    captured.append((jumped, self.get_piece_at(jumped)))
+            self.move_piece(piece, dest)
+        self.switch_side()
+        self.undo_stack.append((piece, start, captured, piece.is_king and not was_king, hash_key, score, masks))
+
+    def unmake_move(self):
+        piece, start, captured, promoted, self.hash_key, self.score, masks = self.undo_stack.pop()
+        self.dark, self.light, self.kings = masks
+        self._legal_moves = None
+        end_row, end_col = piece.position
+        self.grid[end_row][end_col] = None
+        own_pieces = self.pieces_by_color[piece.color]
+        del own_pieces[piece.position]
+        piece.position = start
+        self.grid[start[0]][start[1]] = piece
+        own_pieces[start] = piece
+        if promoted:
+            piece.unmake_king()
+        for (row, col), captured_piece in captured:
+            self.grid[row][col] = captured_piece
+            self.pieces_by_color[captured_piece.color][(row, col)] = captured_piece
+
     # DELETE the methods get_valid_moves, get_simple_moves, get_all_captures.
     # The board doesn't need to know the rules anymore.
 
     def in_bounds(self, pos):
-        r, c = pos
-        return 0 <= r < 8 and 0 <= c < 8
+        return self.geometry.in_bounds(pos)
 
     # The display method could be kept here for simplicity, but for a pure SRP fix,
     # it should also be moved to a Renderer class.
\ No newline at end of file
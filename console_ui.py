@@ -3,7 +3,11 @@ import re
 
 class ConsoleUI:
     def get_move(self, board, player):
+        # Worked out once for the turn, however many attempts the input takes.
+        legal_moves = board.get_legal_moves(player.color)
         capturing_pieces = player.get_pieces_with_captures(board)
+        size = board.geometry.size
+        last_col = chr(ord('a') + size - 1)
         
         while True:
             try:
@@ -13,7 +17,8 @@ class ConsoleUI:
                     return None
                 
                 # Input format validation
-                if not re.match(r"^[a-h][1-8]\s[a-h][1-8]$", move_str):
+                match = re.match(rf"^[a-{last_col}](\d+)\s[a-{last_col}](\d+)$", move_str)
+                if not match or not all(1 <= int(row) <= size for row in match.groups()):
                     print("Invalid format. Please use 'col_start row_start col_end row_end' format (e.g., a3 b4).")
                     continue
                 
@@ -21,11 +26,11 @@ class ConsoleUI:
                 
                 # Convert string coordinates to tuple coordinates
                 start_col = ord(start_str[0]) - ord('a')
-                start_row = 8 - int(start_str[1])
+                start_row = size - int(start_str[1:])
                 start_pos = (start_row, start_col)
                 
                 dest_col = ord(dest_str[0]) - ord('a')
-                dest_row = 8 - int(dest_str[1])
+                dest_row = size - int(dest_str[1:])
                 dest_pos = (dest_row, dest_col)
                 
                 piece = board.get_piece_at(start_pos)
@@ -41,16 +46,16 @@ class ConsoleUI:
                     continue
                 
                 # Correct move validation
+                piece_paths = [path for start, path in legal_moves if start == start_pos]
                 is_simple_move = not capturing_pieces
                 if is_simple_move:
-                    valid_moves = board.rules_engine.get_valid_moves(board, piece)
-                    if dest_pos not in valid_moves:
+                    if [dest_pos] not in piece_paths:
                         print("Invalid simple move.")
                         continue
                     return piece, [dest_pos]
                 else:
                     # Logic for capture moves
-                    capture_paths = board.rules_engine.get_all_captures(board, piece)
+                    capture_paths = piece_paths
                     
                     found_valid_capture = False
                     for path in capture_paths:
@@ -66,10 +71,14 @@ class ConsoleUI:
                 print(f"Error in input. Try again. ({e})")
 
     def display(self, board, player=None):
-        print("  a b c d e f g h")
-        print(" +----------------")
+        size = board.geometry.size
+        width = len(str(size))  # room for the row numbers
+        columns = " " * (width + 1) + " ".join(chr(ord('a') + col) for col in range(size))
+        border = " " * width + "+" + "-" * (2 * size)
+        print(columns)
+        print(border)
         for i, row in enumerate(board.grid):
-            print(f"{8-i}|", end="")
+            print(f"{size-i:>{width}}|", end="")
             for piece in row:
                 if piece is None:
                     print(".", end=" ")
@@ -78,6 +87,6 @@ class ConsoleUI:
                     if piece.is_king:
                         symbol = "♚" if piece.color == "dark" else "♔"
                     print(symbol, end=" ")
-            print(f"|{8-i}")
-        print(" +----------------")
-        print("  a b c d e f g h")
\ No newline at end of file
+            print(f"|{size-i}")
+        print(border)
+        print(columns)
\ No newline at end of file
@@ -0,0 +1,101 @@
+# engine_player.py
+import threading
+import time
+
+from bitboard import BitBoard, board_masks
+from geometry import STANDARD
+from parallel_search import ParallelSearcher
+from piece_factory import PieceFactory
+from player import Player
+from rules_engine import BitboardRulesEngine
+from search import Searcher
+
+
+class EnginePlayer(Player):
+    """
+    A computer opponent: answers get_move with the search result instead of asking the UI.
+    With an opening book, book positions are answered from it without searching.
+
+    With ponder=True it keeps searching while the opponent thinks: a background thread
+    searches the opponent's position on a private BitBoard, filling the transposition
+    table it shares with the real search, so every likely reply has entries waiting. If
+    the opponent then plays the move the ponder search expected, the time spent pondering
+    is taken off the next search's time limit.
+    """
+
+    def __init__(self, color, rules_engine, max_depth=64, time_limit=1.0, node_limit=None, table=None,
+                 workers=1, tablebase=None, book=None, ponder=False):
+        super().__init__(color, rules_engine)
+        self.book = book
+        if workers > 1:
+            if table is not None or tablebase is not None:
+                raise ValueError("table and tablebase are not used by the parallel search (workers > 1)")
+            self.searcher = ParallelSearcher(rules_engine, workers, max_depth, time_limit, node_limit)
+        else:
+            self.searcher = Searcher(rules_engine, table, max_depth, time_limit, node_limit, tablebase)
+        # Parallel search keeps its tables in the workers, so there is nothing to share.
+        self.ponder = ponder and workers <= 1
+        if self.ponder:
+            if rules_engine.geometry is not STANDARD:
+                raise ValueError("pondering runs on an 8x8 BitBoard only")
+            self.ponder_searcher = Searcher(BitboardRulesEngine(), self.searcher.table, max_depth,
+                                            tablebase=tablebase)
+        self.ponder_thread = None
+        self.ponder_credit = 0.0
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+
+    def get_move(self, board, ui_adapter):
+        move = self.book.choose(board, self.color) if self.book is not None else None
+        if move is None:
+            time_limit = self.searcher.time_limit
+            if self.ponder_credit and time_limit:
+                self.searcher.time_limit = max(time_limit - self.ponder_credit, time_limit / 10)
+            try:
+                move = self.searcher.search(board, self.color)
+            finally:
+                self.searcher.time_limit = time_limit
+                self.ponder_credit = 0.0
+        if move is None:
+            return None
+        start, path = move
+        return board.get_piece_at(start), path
+
+    def start_pondering(self, board, color):
+        if not self.ponder:
+            return
+        self.stop_pondering(None)
+        position = BitBoard(self.ponder_searcher.rules_engine, PieceFactory())
+        position.set_position(*board_masks(board), color)
+        self.ponder_position = position
+        self.ponder_started = time.perf_counter()
+        self.ponder_thread = threading.Thread(target=self.ponder_searcher.search, args=(position, color),
+                                              daemon=True)
+        self.ponder_thread.start()
+
+    def stop_pondering(self, board):
+        thread = self.ponder_thread
+        if thread is None:
+            return
+        # stop() is repeated because a search that had not started yet clears the flag.
+        while thread.is_alive():
+            self.ponder_searcher.stop()
+            thread.join(0.01)
+        self.ponder_thread = None
+        if board is None:
+            return
+
+        # Keep the credit only if the opponent played the move the ponder search expected.
+        iterations = self.ponder_searcher.iterations
+        if iterations:
+            self.ponder_position.make_move(iterations[-1][2])
+            if self.ponder_position.hash_key == board.hash_key:
+                self.ponder_hits += 1
+                self.ponder_credit = time.perf_counter() - self.ponder_started
+                return
+        self.ponder_misses += 1
+
+    def close(self):
+        self.stop_pondering(None)
+        if isinstance(self.searcher, ParallelSearcher):
+            self.searcher.close()
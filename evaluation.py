@@ -0,0 +1,84 @@
+# evaluation.py
+# Static evaluation from the side to move's point of view, in hundredths of a man.
+#
+# Every term depends on one piece and its square only, so the whole evaluation is a sum
+# of per-square weights. The boards keep that sum as board.score (dark's point of view),
+# adjusting it in move_piece and restoring it on unmake, which makes evaluate() O(1).
+# Standalone like zobrist.py, since both boards import it.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUM_SQUARES = 32
+MAN_VALUE = 100
+KING_VALUE = 150
+ADVANCE_BONUS = 3  # per row a man has moved towards the crowning row
+BACK_RANK_BONUS = 8  # per man still guarding its own back row
+
+ROW_MASKS = [sum(1 << sq for sq in range(NUM_SQUARES) if sq >> 2 == row) for row in range(8)]
+
+
+def _weight(color, is_king, row, last_row):
+    if is_king:
+        value = KING_VALUE
+    else:
+        rows_advanced = row if color == 'dark' else last_row - row
+        value = MAN_VALUE + ADVANCE_BONUS * rows_advanced + (BACK_RANK_BONUS if rows_advanced == 0 else 0)
+    return value if color == 'dark' else -value
+
+
+def square_weights(size=8):
+    """SQUARE_WEIGHTS for a size x size board, its squares numbered as in geometry.py."""
+    rows = [sq // (size // 2) for sq in range(size * size // 2)]
+    return {(color, is_king): [_weight(color, is_king, row, size - 1) for row in rows]
+            for color in ('dark', 'light') for is_king in (False, True)}
+
+
+# SQUARE_WEIGHTS[(color, is_king)][sq]: what the piece adds to the score, dark positive.
+SQUARE_WEIGHTS = square_weights()
+
+
+def score_masks(dark, light, kings):
+    """The full sum of square weights, dark's point of view. Used to seed board.score."""
+    score = 0
+    for color, mask in (('dark', dark), ('light', light)):
+        for is_king, pieces in ((False, mask & ~kings), (True, mask & kings)):
+            weights = SQUARE_WEIGHTS[(color, is_king)]
+            while pieces:
+                low = pieces & -pieces
+                pieces ^= low
+                score += weights[low.bit_length() - 1]
+    return score
+
+
+def evaluate(board, color):
+    return board.score if color == 'dark' else -board.score
+
+
+def evaluate_masks(dark, light, kings, color):
+    dark_men, light_men = dark & ~kings, light & ~kings
+    score = (dark_men.bit_count() - light_men.bit_count()) * MAN_VALUE
+    score += ((dark & kings).bit_count() - (light & kings).bit_count()) * KING_VALUE
+    for row in range(1, 7):
+        score += ADVANCE_BONUS * (row * (dark_men & ROW_MASKS[row]).bit_count()
+                                  - (7 - row) * (light_men & ROW_MASKS[row]).bit_count())
+    score += BACK_RANK_BONUS * ((dark_men & ROW_MASKS[0]).bit_count() - (light_men & ROW_MASKS[7]).bit_count())
+    return score if color == 'dark' else -score
+
+
+def evaluate_batch(positions):
+    """
+    Scores an N x 4 uint32 array of (dark, light, kings, side) rows, as laid out by
+    position_format, from each side to move's point of view. Needs NumPy.
+    """
+    if np is None:
+        raise RuntimeError("evaluate_batch needs NumPy")
+    positions = np.asarray(positions, dtype='<u4')
+    dark, light, kings, side = positions.T
+    score = np.zeros(len(positions), dtype=np.int64)
+    for (color, is_king), weights in SQUARE_WEIGHTS.items():
+        mask = (dark if color == 'dark' else light) & (kings if is_king else ~kings)
+        bits = np.unpackbits(np.ascontiguousarray(mask).view(np.uint8).reshape(-1, 4), axis=1, bitorder='little')
+        score += bits @ np.array(weights, dtype=np.int64)
+    return np.where(side == 0, score, -score)
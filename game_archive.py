@@ -0,0 +1,209 @@
+# game_archive.py
+# Bulk import and analysis of recorded games.
+#
+# read_pdn streams PDN (or bare move lists) one game at a time, reading line by line so
+# an archive is never held in memory. replay plays a game on a Board through move_piece,
+# checking every move against CheckersRulesEngine. analyse_archive fans the games out over
+# worker processes, a few at a time, and scores every position with a fixed-depth search:
+# a move that gives away at least `blunder` (hundredths of a man) against the best move
+# is reported as a blunder. Results stream out as JSONL, one game per line.
+#
+# A game ends at a result token, at a new tag section or at a blank line after its moves.
+# Without a [FEN] tag the standard start position is used and the side to move is the
+# one owning the first move's start square, since archives usually let dark (Black,
+# squares 1-12) move first while this program starts with light.
+import argparse
+import json
+import re
+import sys
+import time
+
+from bitboard import DARK_START, LIGHT_START, BitBoard, board_masks
+from board import Board
+from notation import parse_move
+from piece_factory import PieceFactory
+from pieces import opponent
+from position_format import parse_fen
+from rules_engine import BitboardRulesEngine, CheckersRulesEngine
+from search import WIN_SCORE, Searcher
+from transposition_table import TranspositionTable
+from worker_pool import map_unordered
+
+TAG = re.compile(r'\[\s*(\w+)\s+"(.*)"\s*\]')
+TOKEN = re.compile(r'[{}()]|[^\s{}()]+')
+MOVE = re.compile(r'(?:\d+\.+)?(\d+(?:[-x]\d+)+)[!?]*')
+# White is light: "1-0" is a light win. "2-0" and friends are the two-point scoring.
+RESULTS = {'1-0': 'light', '2-0': 'light', '0-1': 'dark', '0-2': 'dark',
+           '1/2-1/2': 'draw', '1-1': 'draw', '*': None}
+
+
+def read_pdn(path):
+    """Yields games as {'tags': {...}, 'moves': ['11-15', ...], 'result': color, 'draw' or None}."""
+    tags, moves = {}, []
+    in_comment, variation = False, 0
+
+    def game(result=None):
+        return {'tags': tags, 'moves': moves, 'result': result or RESULTS.get(tags.get('Result'))}
+
+    with open(path, encoding='utf-8', errors='replace') as lines:
+        for line in lines:
+            stripped = line.strip()
+            if not in_comment and not variation:
+                if stripped.startswith('['):
+                    if moves:
+                        yield game()
+                        tags, moves = {}, []
+                    tag = TAG.match(stripped)
+                    if tag:
+                        tags[tag.group(1)] = tag.group(2)
+                    continue
+                if not stripped:
+                    if moves:
+                        yield game()
+                        tags, moves = {}, []
+                    continue
+            for token in TOKEN.findall(line):
+                if in_comment:
+                    in_comment = token != '}'
+                elif token == '{':
+                    in_comment = True
+                elif token == '(':
+                    variation += 1
+                elif token == ')':
+                    variation = max(variation - 1, 0)
+                elif variation:
+                    continue
+                elif token in RESULTS:
+                    if moves or tags:
+                        yield game(RESULTS[token])
+                    tags, moves = {}, []
+                else:
+                    move = MOVE.fullmatch(token)
+                    if move:
+                        moves.append(move.group(1))
+    if moves:
+        yield game()
+
+
+def start_position(game):
+    """(dark, light, kings, color) the game starts from."""
+    if 'FEN' in game['tags']:
+        return parse_fen(game['tags']['FEN'])
+    first = int(re.split('[-x]', game['moves'][0])[0]) if game['moves'] else 32
+    return DARK_START, LIGHT_START, 0, 'dark' if first <= 12 else 'light'
+
+
+def find_move(legal, start, path):
+    """
+    The legal (start, path) written as start, path. A capture may be written with its
+    first and last squares only, as long as that picks out one legal move.
+    """
+    if (start, path) in legal:
+        return start, path
+    matches = [move for move in legal if move[0] == start and move[1][-1] == path[-1] and len(path) == 1]
+    return matches[0] if len(matches) == 1 else None
+
+
+def replay(game, rules_engine=None):
+    """
+    Plays the game out on a Board, yielding (board, color, move) before every move is
+    made. Raises ValueError at the first move that is unreadable or not legal.
+    """
+    board = Board(rules_engine or CheckersRulesEngine(), PieceFactory())
+    dark, light, kings, color = start_position(game)
+    board.set_position(dark, light, kings, color)
+    for ply, text in enumerate(game['moves']):
+        move = find_move(board.get_legal_moves(color), *parse_move(text))
+        if move is None:
+            raise ValueError(f"Illegal move {text} at ply {ply + 1}")
+        yield board, color, move
+        start, path = move
+        piece = board.get_piece_at(start)
+        for dest in path:
+            board.move_piece(piece, dest)
+        board.switch_side()
+        color = opponent(color)
+    yield board, color, None
+
+
+def position_score(searcher, position, color):
+    """Search score of the position from color's side; a side with no moves has lost."""
+    moves = searcher.rules_engine.get_legal_moves(position, color)
+    if not moves:
+        return -WIN_SCORE
+    # Passing the moves makes even a forced move get searched and scored.
+    searcher.search(position, color, moves)
+    return searcher.score
+
+
+def analyse_game(game_id, game, depth=4, blunder=100):
+    """
+    Replays one game and, with depth > 0, scores every position. evals are from dark's
+    point of view, like board.score; a blunder's loss is from the mover's.
+    """
+    started = time.perf_counter()
+    record = {'game': game_id, 'tags': game['tags'], 'result': game['result'], 'plies': 0}
+    searcher = Searcher(BitboardRulesEngine(), TranspositionTable(16), max_depth=depth) if depth > 0 else None
+    position = BitBoard(BitboardRulesEngine(), PieceFactory())
+    scores, moves = [], []
+    first_color = None  # stays None when the start position itself is unreadable
+    try:
+        first_color = start_position(game)[3]
+        for board, color, move in replay(game):
+            if searcher is not None:
+                position.set_position(*board_masks(board), color)
+                scores.append(position_score(searcher, position, color))
+            if move is not None:
+                moves.append(move)
+    except ValueError as error:
+        record['error'] = str(error)
+    record['plies'] = len(moves)
+    if searcher is not None and first_color is not None:
+        record['evals'] = [score if (first_color == 'dark') == (ply % 2 == 0) else -score
+                           for ply, score in enumerate(scores)]
+        record['blunders'] = []
+        for ply, (before, after) in enumerate(zip(scores, scores[1:])):
+            # The mover had `before` available and ended up with -after.
+            loss = before + after
+            if loss >= blunder:
+                record['blunders'].append({'ply': ply + 1, 'move': game['moves'][ply], 'loss': loss})
+    record['seconds'] = round(time.perf_counter() - started, 4)
+    return record
+
+
+def analyse_archive(games, depth=4, blunder=100, workers=1):
+    """Yields analysis records as they finish; at most 2 * workers games are in flight."""
+    jobs = ((game_id, game, depth, blunder) for game_id, game in enumerate(games))
+    return map_unordered(analyse_game, jobs, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay and analyse PDN game archives")
+    parser.add_argument('archives', nargs='+', help="PDN or move-list files")
+    parser.add_argument('--depth', type=int, default=4, help="search depth per position, 0 to only replay")
+    parser.add_argument('--blunder', type=int, default=100, help="loss in hundredths of a man")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--out', default='-', help="output file, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    games = (game for path in args.archives for game in read_pdn(path))
+    out = sys.stdout if args.out == '-' else open(args.out, 'w')
+    started = time.perf_counter()
+    count = rejected = plies = blunders = 0
+    try:
+        for record in analyse_archive(games, args.depth, args.blunder, args.workers):
+            out.write(json.dumps(record) + '\n')
+            count += 1
+            rejected += 'error' in record
+            plies += record['plies']
+            blunders += len(record.get('blunders', ()))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    seconds = time.perf_counter() - started
+    print(f"{count} games ({rejected} with illegal moves), {plies} plies, {blunders} blunders "
+          f"in {seconds:.2f}s ({count / seconds:.1f} games/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
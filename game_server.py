@@ -0,0 +1,205 @@
+# game_server.py
+# Many concurrent matches in one process: an asyncio TCP server speaking a line protocol,
+# one Match per game, every game a task on the event loop. Computer moves run in a
+# thread pool so a long search never blocks the loop.
+#
+# Client to server                     Server to client
+#   NEW <dark|light> [opponent]          GAME <id> <color>
+#   MOVE <id> <move, e.g. 22-18>         TURN <id> <FEN> <legal moves, comma separated>
+#   QUIT <id>                            OVER <id> <dark|light|aborted>
+#                                        ERROR <id or 0> <reason>
+# The opponent is a selfplay.py spec: 'random' (default), 'engine[:depth]', 'mcts[:playouts]'.
+#
+# Limits: games per connection, games on the server, line length and seconds per move,
+# for the client's moves and the computer's alike: however deep a search the spec asks
+# for, a server engine stops after --engine-time seconds and plays its best move so far.
+# Replies go through StreamWriter.drain, so a client that stops reading stalls only its
+# own games instead of growing the server's buffers.
+import argparse
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from bitboard import BitBoard
+from match import Match
+from notation import format_move
+from piece_factory import PieceFactory
+from pieces import opponent
+from player import Player
+from position_format import board_to_fen
+from rules_engine import BitboardRulesEngine
+from selfplay import make_player
+from transposition_table import ThreadTables
+
+MAX_LINE = 1024
+
+
+class RemoteUI:
+    """Async UI adapter for one game: prompts go out as TURN lines, answers arrive as MOVE lines."""
+
+    def __init__(self, connection, game_id, move_timeout):
+        self.connection = connection
+        self.game_id = game_id
+        self.move_timeout = move_timeout
+        self.pending = None
+
+    async def display(self, board, player=None):
+        pass
+
+    async def get_move(self, board, player):
+        legal_moves = {format_move(start, path): (start, path) for start, path in board.get_legal_moves(player.color)}
+        fen = board_to_fen(board, player.color)
+        while not self.connection.closed:
+            self.pending = asyncio.get_running_loop().create_future()
+            await self.connection.send(f"TURN {self.game_id} {fen} {','.join(legal_moves)}")
+            try:
+                text = await asyncio.wait_for(self.pending, self.move_timeout)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                self.pending = None
+            if text is None:
+                return None  # QUIT or connection closed
+            if text not in legal_moves:
+                await self.connection.send(f"ERROR {self.game_id} illegal move {text}")
+                continue
+            start, path = legal_moves[text]
+            return board.get_piece_at(start), path
+        return None
+
+    def answer(self, text):
+        # False when the game is not waiting for a move (the line is then rejected).
+        if self.pending is None or self.pending.done():
+            return False
+        self.pending.set_result(text)
+        return True
+
+
+class Connection:
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.games = {}  # game id -> (RemoteUI, task)
+        self.closed = False
+
+    async def send(self, line):
+        self.writer.write(line.encode() + b'\n')
+        await self.writer.drain()
+
+    async def serve(self):
+        try:
+            while True:
+                try:
+                    line = await self.reader.readline()
+                except ValueError:
+                    await self.send("ERROR 0 line too long")
+                    break
+                if not line:
+                    break
+                await self.handle(line.decode(errors='replace').split())
+        except ConnectionError:
+            pass
+        finally:
+            self.closed = True
+            for ui, task in list(self.games.values()):
+                ui.answer(None)
+            await asyncio.gather(*(task for _, task in self.games.values()), return_exceptions=True)
+            self.writer.close()
+
+    async def handle(self, words):
+        if not words:
+            return
+        command = words[0].upper()
+        if command == 'NEW' and len(words) in (2, 3) and words[1] in ('dark', 'light'):
+            await self.new_game(words[1], words[2] if len(words) == 3 else 'random')
+        elif command in ('MOVE', 'QUIT') and len(words) == (3 if command == 'MOVE' else 2):
+            game = self.games.get(words[1])
+            if game is None or not game[0].answer(words[2] if command == 'MOVE' else None):
+                await self.send(f"ERROR {words[1]} not waiting for a move")
+        else:
+            await self.send(f"ERROR 0 bad command {' '.join(words)[:40]}")
+
+    async def new_game(self, color, opponent_spec):
+        server = self.server
+        if len(self.games) >= server.games_per_connection:
+            await self.send("ERROR 0 too many games on this connection")
+            return
+        if server.active_games >= server.max_games:
+            await self.send("ERROR 0 server full")
+            return
+        game_id = str(next(server.game_ids))
+        ui = RemoteUI(self, game_id, server.move_timeout)
+        rules_engine = server.rules_engine
+        try:
+            computer = make_player(opponent_spec, opponent(color), rules_engine, int(game_id), server.tables,
+                                   server.engine_time)
+        except ValueError as error:
+            await self.send(f"ERROR 0 {error}")
+            return
+        players = {color: Player(color, rules_engine), opponent(color): computer}
+        match = Match(BitBoard(rules_engine, PieceFactory()), [players['dark'], players['light']])
+        # run_game announces the game itself, so the slot is given back even if that fails.
+        server.active_games += 1
+        self.games[game_id] = (ui, asyncio.create_task(self.run_game(game_id, color, match, ui)))
+
+    async def run_game(self, game_id, color, match, ui):
+        try:
+            await self.send(f"GAME {game_id} {color}")
+            result = await match.play_async(ui, self.server.executor)
+            await self.send(f"OVER {game_id} {result or 'aborted'}")
+        except ConnectionError:
+            pass
+        finally:
+            self.server.active_games -= 1
+            self.games.pop(game_id, None)
+
+
+class GameServer:
+    def __init__(self, max_games=10000, games_per_connection=1000, move_timeout=300.0, engine_threads=4,
+                 engine_time=1.0):
+        self.max_games = max_games
+        self.games_per_connection = games_per_connection
+        self.move_timeout = move_timeout
+        self.engine_time = engine_time
+        self.executor = ThreadPoolExecutor(engine_threads)
+        # Engine searches run on the executor's threads, so one table per thread serves every game.
+        self.tables = ThreadTables(16)
+        self.rules_engine = BitboardRulesEngine()
+        self.game_ids = itertools.count(1)
+        self.active_games = 0
+
+    async def handle_connection(self, reader, writer):
+        await Connection(self, reader, writer).serve()
+
+    async def start(self, host='127.0.0.1', port=8765):
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE)
+
+
+async def serve(args):
+    server = GameServer(args.max_games, args.games_per_connection, args.move_timeout, args.engine_threads,
+                        args.engine_time)
+    listener = await server.start(args.host, args.port)
+    print(f"serving on {args.host}:{args.port}")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Checkers game server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-games', type=int, default=10000)
+    parser.add_argument('--games-per-connection', type=int, default=1000)
+    parser.add_argument('--move-timeout', type=float, default=300.0)
+    parser.add_argument('--engine-threads', type=int, default=4)
+    parser.add_argument('--engine-time', type=float, default=1.0, help="seconds per computer move")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
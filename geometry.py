@@ -0,0 +1,36 @@
+# geometry.py
+# The shape of the board: its size and how many rows of men each side starts on, plus
+# every per-square table that depends on them, built once per geometry at import.
+# Playable squares are those with (row + col) odd, numbered row by row from dark's side,
+# sq = row * (size // 2) + col // 2, which on 8x8 is the numbering bitboard.py uses and
+# on 10x10 the usual 1-50 numbering less one.
+from evaluation import square_weights
+from move_tables import build_rays, build_tables
+from zobrist import piece_keys
+
+
+class Geometry:
+    def __init__(self, size, rows):
+        self.size = size
+        self.rows = rows  # rows of men per side at the start
+        self.squares = [(row, col) for row in range(size) for col in range(size) if (row + col) % 2 == 1]
+        self.square_numbers = {pos: sq for sq, pos in enumerate(self.squares)}
+        self.neighbors, self.jumps, self.promotion_row = build_tables(size)
+        self.rays = build_rays(size)
+        self.piece_keys = piece_keys(len(self.squares))
+        self.square_weights = square_weights(size)
+
+    def start_squares(self, color):
+        rows = range(self.rows) if color == 'dark' else range(self.size - self.rows, self.size)
+        return [pos for pos in self.squares if pos[0] in rows]
+
+    def in_bounds(self, pos):
+        r, c = pos
+        return 0 <= r < self.size and 0 <= c < self.size
+
+    def __repr__(self):
+        return f"Geometry({self.size}, {self.rows})"
+
+
+STANDARD = Geometry(8, 3)
+INTERNATIONAL = Geometry(10, 4)
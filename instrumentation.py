@@ -0,0 +1,268 @@
+# instrumentation.py
+# Opt-in counters and timers for the hot paths. Nothing is measured until enable() is
+# called: it swaps timing wrappers in for the methods listed in TARGETS and disable()
+# puts the originals back, so a program that never enables it runs the unwrapped code.
+#
+# Readings come out as a snapshot dict or as Prometheus text exposition, and
+# profile_selfplay runs cProfile over a number of self-play games.
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+from collections import defaultdict
+
+from bitboard import BitBoard
+from board import Board
+from mcts import MCTSPlayer
+from rules_engine import BitboardRulesEngine, CheckersRulesEngine, InternationalRulesEngine, RulesEngine
+from search import Searcher
+
+PREFIX = 'checkers_'
+
+
+class Metrics:
+    """Counters and timers keyed by (name, labels), labels being a tuple of (key, value) pairs."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counters = defaultdict(int)
+        self.timers = defaultdict(lambda: [0, 0.0, 0.0])  # count, total seconds, longest
+        self.gauges = {}
+
+    def count(self, name, amount=1, **labels):
+        self.counters[(name, tuple(sorted(labels.items())))] += amount
+
+    def observe(self, name, seconds, **labels):
+        timer = self.timers[(name, tuple(sorted(labels.items())))]
+        timer[0] += 1
+        timer[1] += seconds
+        if seconds > timer[2]:
+            timer[2] = seconds
+
+    def gauge(self, name, value, **labels):
+        self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def snapshot(self):
+        def key(name, labels):
+            return name + ''.join(f'[{k}={v}]' for k, v in labels)
+
+        snapshot = {key(*k): v for k, v in self.counters.items()}
+        snapshot.update((key(*k), v) for k, v in self.gauges.items())
+        for k, (count, total, longest) in self.timers.items():
+            snapshot[key(*k)] = {'count': count, 'seconds': total, 'max_seconds': longest,
+                                 'mean_seconds': total / count if count else 0.0}
+        return snapshot
+
+    def prometheus(self):
+        def series(name, labels, suffix=''):
+            text = ','.join(f'{k}="{v}"' for k, v in labels)
+            return f"{PREFIX}{name}{suffix}{{{text}}}" if text else f"{PREFIX}{name}{suffix}"
+
+        lines = []
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f"# TYPE {PREFIX}{name}_total counter")
+            lines += [f"{series(name, labels, '_total')} {value}"
+                      for (n, labels), value in sorted(self.counters.items()) if n == name]
+        for name in sorted({name for name, _ in self.gauges}):
+            lines.append(f"# TYPE {PREFIX}{name} gauge")
+            lines += [f"{series(name, labels)} {value}"
+                      for (n, labels), value in sorted(self.gauges.items()) if n == name]
+        for name in sorted({name for name, _ in self.timers}):
+            lines.append(f"# TYPE {PREFIX}{name}_seconds summary")
+            for (n, labels), (count, total, _) in sorted(self.timers.items()):
+                if n == name:
+                    lines.append(f"{series(name, labels, '_seconds_count')} {count}")
+                    lines.append(f"{series(name, labels, '_seconds_sum')} {total:.9f}")
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Metrics()
+clock = time.perf_counter
+
+
+def _timed_valid_moves(original):
+    def get_valid_moves(self, board, piece, *args):
+        started = clock()
+        moves = original(self, board, piece, *args)
+        METRICS.observe('get_valid_moves', clock() - started)
+        METRICS.count('moves_generated', len(moves), source='get_valid_moves')
+        return moves
+    return get_valid_moves
+
+
+def _timed_captures(original):
+    # Recursive calls come back through this wrapper too: the visited set holds the
+    # squares jumped so far, so its size is the recursion depth.
+    def get_all_captures(self, board, piece, position=None, visited=None):
+        depth = len(visited) if visited else 0
+        METRICS.count('get_all_captures_calls', depth=depth)
+        if depth:
+            captures = original(self, board, piece, position, visited)
+        else:
+            started = clock()
+            captures = original(self, board, piece, position, visited)
+            METRICS.observe('get_all_captures', clock() - started)
+        METRICS.count('get_all_captures_branches', len(captures), depth=depth)
+        return captures
+    return get_all_captures
+
+
+def _timed_legal_moves(original):
+    def get_legal_moves(self, board, color):
+        started = clock()
+        moves = original(self, board, color)
+        METRICS.observe('get_legal_moves', clock() - started, engine=type(self).__name__)
+        METRICS.count('moves_generated', len(moves), source=type(self).__name__)
+        return moves
+    return get_legal_moves
+
+
+def _cached_legal_moves(original):
+    def get_legal_moves(self, color):
+        cached = self._legal_moves
+        hit = cached is not None and cached[0] == self.hash_key and cached[1] == color
+        METRICS.count('legal_move_cache', result='hit' if hit else 'miss', board=type(self).__name__)
+        return original(self, color)
+    return get_legal_moves
+
+
+def _timed_move_piece(original):
+    def move_piece(self, piece, dest):
+        started = clock()
+        captured = original(self, piece, dest)
+        METRICS.observe('move_piece', clock() - started, board=type(self).__name__)
+        if captured:
+            METRICS.count('captures', board=type(self).__name__)
+        return captured
+    return move_piece
+
+
+def _timed_search(original):
+    def search(self, board, color, root_moves=None):
+        started = clock()
+        move = original(self, board, color, root_moves)
+        seconds = clock() - started
+        METRICS.observe('search', seconds)
+        METRICS.count('search_nodes', self.nodes)
+        if self.nodes:  # a forced move returns without searching
+            METRICS.gauge('search_depth', self.depth)
+            METRICS.gauge('search_nodes_per_second', round(self.nodes / seconds))
+        for name, value in self.table.stats().items():
+            METRICS.gauge(f'transposition_table_{name}', value)
+        return move
+    return search
+
+
+def _timed_root(original):
+    # One call per iteration of iterative deepening, so this is the time per ply.
+    def _root(self, board, color, moves, depth):
+        started = clock()
+        try:
+            return original(self, board, color, moves, depth)
+        finally:
+            METRICS.observe('search_iteration', clock() - started, depth=depth)
+    return _root
+
+
+def _timed_mcts(original):
+    def search(self, dark, light, kings, color):
+        started = clock()
+        move = original(self, dark, light, kings, color)
+        METRICS.observe('mcts_search', clock() - started)
+        METRICS.count('mcts_playouts', self.last_playouts)
+        METRICS.count('mcts_reused_visits', self.reused_visits)
+        if self.last_playouts:
+            METRICS.gauge('mcts_playouts_per_second', round(self.playouts_per_second))
+        return move
+    return search
+
+
+# (class, method name, wrapper factory)
+TARGETS = [
+    (CheckersRulesEngine, 'get_valid_moves', _timed_valid_moves),
+    (CheckersRulesEngine, 'get_all_captures', _timed_captures),
+    (RulesEngine, 'get_legal_moves', _timed_legal_moves),
+    (BitboardRulesEngine, 'get_legal_moves', _timed_legal_moves),
+    (InternationalRulesEngine, 'get_legal_moves', _timed_legal_moves),
+    (Board, 'get_legal_moves', _cached_legal_moves),
+    (BitBoard, 'get_legal_moves', _cached_legal_moves),
+    (Board, 'move_piece', _timed_move_piece),
+    (BitBoard, 'move_piece', _timed_move_piece),
+    (Searcher, 'search', _timed_search),
+    (Searcher, '_root', _timed_root),
+    (MCTSPlayer, 'search', _timed_mcts),
+]
+_originals = {}
+
+
+def enable():
+    for cls, name, wrap in TARGETS:
+        if (cls, name) not in _originals:
+            _originals[(cls, name)] = cls.__dict__[name]
+            setattr(cls, name, wrap(cls.__dict__[name]))
+
+
+def disable():
+    for (cls, name), original in _originals.items():
+        setattr(cls, name, original)
+    _originals.clear()
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+def profile_selfplay(games, dark_spec='engine:3', light_spec='random', seed=0, max_plies=300,
+                     classic=False, sort='cumulative', limit=30):
+    """Runs games in this process under cProfile and returns the pstats report as text."""
+    from selfplay import play_game
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for game_id in range(games):
+        play_game(game_id, dark_spec, light_spec, seed + 2 * game_id, max_plies, classic)
+    profiler.disable()
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats(sort).print_stats(limit)
+    return report.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Instrumented or profiled self-play")
+    parser.add_argument('--games', type=int, default=5)
+    parser.add_argument('--dark', default='engine:3')
+    parser.add_argument('--light', default='random')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--classic', action='store_true', help="Board and CheckersRulesEngine")
+    parser.add_argument('--format', choices=['json', 'prometheus'], default='prometheus')
+    parser.add_argument('--profile', action='store_true', help="print a cProfile report instead")
+    parser.add_argument('--sort', default='cumulative')
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        print(profile_selfplay(args.games, args.dark, args.light, args.seed,
+                               classic=args.classic, sort=args.sort))
+        return
+
+    from selfplay import play_game
+
+    enable()
+    try:
+        for game_id in range(args.games):
+            play_game(game_id, args.dark, args.light, args.seed + 2 * game_id, 300, args.classic)
+    finally:
+        disable()
+    if args.format == 'json':
+        json.dump(METRICS.snapshot(), sys.stdout, indent=2)
+        print()
+    else:
+        sys.stdout.write(METRICS.prometheus())
+
+
+if __name__ == "__main__":
+    main()
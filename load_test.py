@@ -0,0 +1,78 @@
+# load_test.py
+# Plays many simultaneous games against game_server.py and reports move latency: the
+# time from sending MOVE to receiving the next TURN, which covers the server's work and
+# the opponent's reply. Each connection opens its games up front and answers every
+# TURN with a random legal move.
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+from game_server import MAX_LINE
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+async def play_connection(host, port, games, opponent, seed, latencies, results):
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    rng = random.Random(seed)
+    for _ in range(games):
+        writer.write(f"NEW light {opponent}\n".encode())
+    await writer.drain()
+    sent_at = {}
+    remaining = games
+    while remaining:
+        line = await reader.readline()
+        if not line:
+            break
+        kind, game_id, *rest = line.decode().split()
+        if kind == 'TURN':
+            now = time.perf_counter()
+            if game_id in sent_at:
+                latencies.append(now - sent_at[game_id])
+            move = rng.choice(rest[1].split(','))
+            writer.write(f"MOVE {game_id} {move}\n".encode())
+            sent_at[game_id] = time.perf_counter()
+            await writer.drain()
+        elif kind == 'OVER':
+            results[rest[0]] += 1
+            remaining -= 1
+        elif kind == 'ERROR':
+            results['error'] += 1
+            if game_id == '0':
+                remaining -= 1  # a NEW that was turned down
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(host, port, connections, games, opponent, seed=0):
+    latencies, results = [], Counter()
+    started = time.perf_counter()
+    await asyncio.gather(*(play_connection(host, port, games, opponent, seed + i, latencies, results)
+                           for i in range(connections)))
+    return latencies, results, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for game_server.py")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--connections', type=int, default=20)
+    parser.add_argument('--games', type=int, default=50, help="simultaneous games per connection")
+    parser.add_argument('--opponent', default='random', help="server-side opponent spec")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    latencies, results, seconds = asyncio.run(run(args.host, args.port, args.connections, args.games,
+                                                  args.opponent, args.seed))
+    print(f"{args.connections * args.games} games ({dict(results)}) in {seconds:.2f}s")
+    print(f"{len(latencies)} moves, {len(latencies) / seconds:.0f} moves/s, "
+          f"p50 {percentile(latencies, 0.50) * 1000:.2f}ms, p99 {percentile(latencies, 0.99) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
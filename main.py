@@ -1,41 +1,75 @@
 # main.py
+import argparse
 
 from match import Match
 from board import Board
 from player import Player
 from console_ui import ConsoleUI
 from piece_factory import PieceFactory
-from rules_engine import CheckersRulesEngine
+from geometry import INTERNATIONAL, STANDARD
+from rules_engine import CheckersRulesEngine, InternationalRulesEngine
+from engine_player import EnginePlayer
+from opening_book import OpeningBook
+from tablebase import Tablebase
+
+# name -> (geometry, rules engine class)
+VARIANTS = {
+    'english': (STANDARD, CheckersRulesEngine),
+    'international': (INTERNATIONAL, InternationalRulesEngine),
+}
 
 class Checkers:
-    def __init__(self):
-        rules_engine = CheckersRulesEngine()
+    def __init__(self, engine_colors=(), think_time=1.0, fen=None, tablebase=None, book=None,
+                 variant='english'):
+        geometry, rules_engine_class = VARIANTS[variant]
+        rules_engine = rules_engine_class(geometry)
         piece_factory = PieceFactory()
         
-        board = Board(rules_engine, piece_factory)
+        board = Board(rules_engine, piece_factory, geometry)
+        endgames = Tablebase(tablebase) if tablebase else None
+        openings = OpeningBook(book) if book else None
         
-        black_player = Player("dark", rules_engine)
-        red_player = Player("light", rules_engine)
+        # Against a human the engine ponders while the human thinks. The ponder search
+        # runs on a BitBoard, which only comes in 8x8.
+        ponder = len(set(engine_colors)) == 1 and geometry is STANDARD
+
+        def make_player(color):
+            if color in engine_colors:
+                return EnginePlayer(color, rules_engine, time_limit=think_time, tablebase=endgames,
+                                    book=openings, ponder=ponder)
+            return Player(color, rules_engine)
+
+        black_player = make_player("dark")
+        red_player = make_player("light")
         players = [black_player, red_player]
-        
-        # Populate players with pieces from the board
-        for row in range(8):
-            for col in range(8):
-                piece = board.get_piece_at((row, col))
-                if piece:
-                    if piece.color == "dark":
-                        black_player.pieces.append(piece)
-                    else:
-                        red_player.pieces.append(piece)
 
         ui_adapter = ConsoleUI()
 
+        self.players = players
         self.match = Match(board, players)
+        if fen:
+            self.match.load_position(fen)
         self.ui_adapter = ui_adapter
 
     def run(self):
-        self.match.start_game(self.ui_adapter)
+        try:
+            self.match.start_game(self.ui_adapter)
+        finally:
+            for player in self.players:
+                player.close()
 
 if __name__ == "__main__":
-    game = Checkers()
+    parser = argparse.ArgumentParser(description="Play checkers in the console")
+    parser.add_argument('--engine', action='append', choices=['dark', 'light'], default=[],
+                        help="let the computer play this color (can be given twice)")
+    parser.add_argument('--think-time', type=float, default=1.0, help="seconds per computer move")
+    parser.add_argument('--fen', help="start from this position, e.g. 'B:W18,24,K27:B12,16'")
+    parser.add_argument('--tablebase', help="endgame table written by tablebase.py build")
+    parser.add_argument('--book', help="opening book written by opening_book.py build")
+    parser.add_argument('--variant', choices=VARIANTS, default='english',
+                        help="'international' is 10x10 with flying kings and maximum capture")
+    args = parser.parse_args()
+    if args.variant != 'english' and (args.fen or args.tablebase or args.book):
+        parser.error("--fen, --tablebase and --book are for English checkers only")
+    game = Checkers(args.engine, args.think_time, args.fen, args.tablebase, args.book, args.variant)
     game.run()
\ No newline at end of file
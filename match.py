@@ -1,20 +1,17 @@
 # match.py
+from pieces import opponent
+from position_format import load_fen
 
 class Match:
     def __init__(self, board, players):
         self.board = board
         self.players = players
         self.current_player_index = 1
-        self.assign_pieces() # Call this to assign pieces to players at the start.
 
-    def assign_pieces(self):
-        for r in range(8):
-            for c in range(8):
-                piece = self.board.get_piece_at((r, c))
-                if piece:
-                    for player in self.players:
-                        if player.color == piece.color:
-                            player.pieces.append(piece)
+    def load_position(self, fen):
+        # Continue a game from a stored position: the side to move comes from the FEN.
+        color = load_fen(self.board, fen)
+        self.current_player_index = [player.color for player in self.players].index(color)
 
     def start_game(self, ui_adapter):
         print("Starting Checkers game!")
@@ -26,18 +23,46 @@ class Match:
                 print(f"{current_player.color} cannot move. Game over.")
                 break
 
-            move_result = ui_adapter.get_move(self.board, current_player)
-            if move_result is None: # User typed "gg" to quit
-                print("Game ended by user.")
-                break
+            waiting_player = self.players[1 - self.current_player_index]
+            waiting_player.start_pondering(self.board, current_player.color)
+            try:
+                move_result = current_player.get_move(self.board, ui_adapter)
+                if move_result is None: # User typed "gg" to quit
+                    print("Game ended by user.")
+                    break
+
+                piece, move_path = move_result
+
+                # Handle single moves and multi-jumps
+                for dest_pos in move_path:
+                    self.board.move_piece(piece, dest_pos)
+
+                self.switch_turn()
+            finally:
+                waiting_player.stop_pondering(self.board)
+
+    async def play_async(self, ui_adapter, executor=None):
+        """
+        start_game for an event loop, with an async ui_adapter and no printing. Returns the
+        winning color, or None when a player quit.
+        """
+        while True:
+            current_player = self.players[self.current_player_index]
+            await ui_adapter.display(self.board, current_player)
+
+            if not current_player.has_moves(self.board):
+                return opponent(current_player.color)
+
+            move_result = await current_player.get_move_async(self.board, ui_adapter, executor)
+            if move_result is None:
+                return None
 
             piece, move_path = move_result
-            
-            # Handle single moves and multi-jumps
             for dest_pos in move_path:
                 self.board.move_piece(piece, dest_pos)
-            
+
             self.switch_turn()
 
     def switch_turn(self):
-        self.current_player_index = 1 - self.current_player_index
\ No newline at end of file
+        self.current_player_index = 1 - self.current_player_index
+        self.board.switch_side()
\ No newline at end of file
@@ -0,0 +1,290 @@
+# mcts.py
+# Monte Carlo tree search player. The tree lives in a NodePool: one slot per node in
+# flat arrays (visits, score, parent, first child, child count, position masks), with
+# the children of a node stored side by side. Positions are (dark, light, kings) masks
+# played with BitboardRulesEngine, whatever board the Match uses.
+#
+# Playouts can be farmed out to worker processes: a batch of leaves is selected with a
+# virtual loss on their paths, the rollouts run in the pool, then the results are
+# backed up in the main process, which keeps the only copy of the tree.
+import argparse
+import math
+import random
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import DARK_START, LIGHT_START, SQUARE_POS, board_masks
+from evaluation import evaluate_masks
+from pieces import COLOR_CODES, opponent
+from player import Player
+from rules_engine import BitboardRulesEngine
+
+COLORS = ('dark', 'light')  # indexed by DARK / LIGHT
+DRAW_REWARD = 0.5
+EXPLORATION = 1.4
+
+_generator = BitboardRulesEngine()
+
+
+def random_policy(moves, dark, light, kings, color, rng):
+    return rng.choice(moves)
+
+
+def greedy_policy(moves, dark, light, kings, color, rng):
+    # One ply of lookahead on the static evaluation; ties broken at random.
+    best_score, best = None, []
+    for move in moves:
+        score = -evaluate_masks(*_generator.apply_move(dark, light, kings, color, move), opponent(color))
+        if best_score is None or score > best_score:
+            best_score, best = score, [move]
+        elif score == best_score:
+            best.append(move)
+    return rng.choice(best)
+
+
+ROLLOUT_POLICIES = {'random': random_policy, 'greedy': greedy_policy}
+
+
+def rollout(dark, light, kings, color, policy='random', seed=None, max_plies=200):
+    """
+    Plays the position out and returns the winning color, or 'draw'. A rollout that hits
+    max_plies is settled by the evaluation: a clear material lead counts as a win.
+    """
+    choose = ROLLOUT_POLICIES[policy]
+    rng = random.Random(seed)
+    for _ in range(max_plies):
+        moves = _generator.generate_moves(dark, light, kings, color)
+        if not moves:
+            return opponent(color)
+        move = choose(moves, dark, light, kings, color, rng)
+        dark, light, kings = _generator.apply_move(dark, light, kings, color, move)
+        color = opponent(color)
+    score = evaluate_masks(dark, light, kings, color)
+    if abs(score) < 100:
+        return 'draw'
+    return color if score > 0 else opponent(color)
+
+
+def _rollout_batch(jobs):
+    return [rollout(*job) for job in jobs]
+
+
+class NodePool:
+    """
+    Array-backed tree. score[n] is the reward collected for the player who made the move
+    into node n; moves[n] is that move as a raw (src, path, captured) tuple.
+    """
+
+    def __init__(self):
+        self.visits = array('I')
+        self.score = array('d')
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.child_count = array('i')  # -1 until the node is expanded
+        self.dark = array('I')
+        self.light = array('I')
+        self.kings = array('I')
+        self.side = array('B')
+        self.moves = []
+
+    def __len__(self):
+        return len(self.visits)
+
+    def add(self, parent, move, dark, light, kings, side):
+        self.visits.append(0)
+        self.score.append(0.0)
+        self.parent.append(parent)
+        self.first_child.append(-1)
+        self.child_count.append(-1)
+        self.dark.append(dark)
+        self.light.append(light)
+        self.kings.append(kings)
+        self.side.append(side)
+        self.moves.append(move)
+        return len(self.visits) - 1
+
+    def position(self, node):
+        return self.dark[node], self.light[node], self.kings[node], COLORS[self.side[node]]
+
+    def children(self, node):
+        first = self.first_child[node]
+        return range(first, first + max(self.child_count[node], 0))
+
+    def expand(self, node):
+        dark, light, kings, color = self.position(node)
+        moves = _generator.generate_moves(dark, light, kings, color)
+        self.first_child[node] = len(self)
+        self.child_count[node] = len(moves)
+        side = COLOR_CODES[opponent(color)]
+        for move in moves:
+            self.add(node, move, *_generator.apply_move(dark, light, kings, color, move), side)
+
+    def subtree(self, node):
+        """A new pool holding node and everything below it, node becoming the root 0."""
+        pool = NodePool()
+        pool.add(-1, None, self.dark[node], self.light[node], self.kings[node], self.side[node])
+        pool.visits[0], pool.score[0] = self.visits[node], self.score[node]
+        queue = [(node, 0)]
+        while queue:
+            old, new = queue.pop()
+            if self.child_count[old] < 0:
+                continue
+            pool.first_child[new] = len(pool)
+            pool.child_count[new] = self.child_count[old]
+            for child in self.children(old):
+                copy = pool.add(new, self.moves[child], self.dark[child], self.light[child],
+                                self.kings[child], self.side[child])
+                pool.visits[copy], pool.score[copy] = self.visits[child], self.score[child]
+                queue.append((child, copy))
+        return pool
+
+
+class MCTSPlayer(Player):
+    """
+    Chooses the most visited move after a budget of playouts and/or seconds. The tree
+    from the previous move is kept and re-rooted at the position the opponent left.
+    """
+
+    def __init__(self, color, rules_engine, playouts=2000, time_limit=None, policy='random',
+                 exploration=EXPLORATION, workers=1, batch_size=None, max_plies=200, seed=None):
+        super().__init__(color, rules_engine)
+        if policy not in ROLLOUT_POLICIES:
+            raise ValueError(f"Unknown rollout policy: {policy}")
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.policy = policy
+        self.exploration = exploration
+        self.max_plies = max_plies
+        self.rng = random.Random(seed)
+        self.workers = workers
+        self.batch_size = batch_size or (1 if workers <= 1 else 8 * workers)
+        self.executor = ProcessPoolExecutor(workers) if workers > 1 else None
+        self.pool = None
+        self.last_playouts = 0
+        self.last_seconds = 0.0
+        self.reused_visits = 0
+
+    @property
+    def playouts_per_second(self):
+        return self.last_playouts / self.last_seconds if self.last_seconds else 0.0
+
+    def get_move(self, board, ui_adapter):
+        move = self.search(*board_masks(board), self.color)
+        if move is None:
+            return None
+        src, path, _ = move
+        return board.get_piece_at(SQUARE_POS[src]), [SQUARE_POS[sq] for sq in path]
+
+    def search(self, dark, light, kings, color):
+        """Returns the chosen raw move, or None when color has no move."""
+        self.last_playouts = 0
+        self.last_seconds = 0.0
+        self._set_root(dark, light, kings, color)
+        pool = self.pool
+        if pool.child_count[0] < 0:
+            pool.expand(0)
+        if pool.child_count[0] <= 1:
+            return pool.moves[pool.first_child[0]] if pool.child_count[0] else None
+
+        started = time.perf_counter()
+        deadline = started + self.time_limit if self.time_limit else None
+        done = 0
+        while done < self.playouts and (deadline is None or time.perf_counter() < deadline):
+            paths = [self._select() for _ in range(min(self.batch_size, self.playouts - done))]
+            jobs = [pool.position(path[-1]) + (self.policy, self.rng.getrandbits(32), self.max_plies)
+                    for path in paths]
+            if self.executor is None:
+                results = _rollout_batch(jobs)
+            else:
+                chunks = [jobs[i::self.workers] for i in range(self.workers)]
+                results = [None] * len(jobs)
+                for i, chunk_results in enumerate(self.executor.map(_rollout_batch, chunks)):
+                    results[i::self.workers] = chunk_results
+            for path, winner in zip(paths, results):
+                self._backpropagate(path, winner)
+            done += len(paths)
+        self.last_playouts = done
+        self.last_seconds = time.perf_counter() - started
+
+        best = max(pool.children(0), key=lambda child: pool.visits[child])
+        return pool.moves[best]
+
+    def _set_root(self, dark, light, kings, color):
+        # Look for the position among the children and grandchildren of the old root:
+        # after our move and the opponent's reply, it is normally two plies down.
+        pool, side = self.pool, COLOR_CODES[color]
+        self.reused_visits = 0
+        if pool is not None:
+            candidates = [0] + list(pool.children(0))
+            candidates += [grandchild for child in candidates[1:] for grandchild in pool.children(child)]
+            for node in candidates:
+                if (pool.dark[node], pool.light[node], pool.kings[node], pool.side[node]) == (dark, light, kings, side):
+                    self.pool = pool.subtree(node)
+                    self.reused_visits = self.pool.visits[0]
+                    return
+        self.pool = NodePool()
+        self.pool.add(-1, None, dark, light, kings, side)
+
+    def _select(self):
+        # Walks down by UCT, expanding the first leaf that was already visited once.
+        # Every node on the path gets its visit now (the virtual loss), so that other
+        # leaves of the same batch spread out.
+        pool = self.pool
+        node = 0
+        path = [0]
+        pool.visits[0] += 1
+        while True:
+            if pool.child_count[node] < 0:
+                if pool.visits[node] <= 1 and node != 0:
+                    return path
+                pool.expand(node)
+            if not pool.child_count[node]:
+                return path
+            log_visits = math.log(pool.visits[node])
+            best_value, best_child = -1.0, None
+            for child in pool.children(node):
+                visits = pool.visits[child]
+                if not visits:
+                    best_child = child
+                    break
+                value = pool.score[child] / visits + self.exploration * math.sqrt(log_visits / visits)
+                if value > best_value:
+                    best_value, best_child = value, child
+            node = best_child
+            path.append(node)
+            pool.visits[node] += 1
+
+    def _backpropagate(self, path, winner):
+        pool = self.pool
+        for node in path:
+            mover = COLORS[1 - pool.side[node]]
+            if winner == mover:
+                pool.score[node] += 1.0
+            elif winner == 'draw':
+                pool.score[node] += DRAW_REWARD
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MCTS playouts/sec from the start position")
+    parser.add_argument('--playouts', type=int, default=2000)
+    parser.add_argument('--policy', choices=sorted(ROLLOUT_POLICIES), default='random')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1])
+    args = parser.parse_args(argv)
+
+    for workers in args.workers:
+        player = MCTSPlayer('light', None, playouts=args.playouts, policy=args.policy, workers=workers, seed=0)
+        if player.executor is not None:
+            player.executor.submit(int).result()  # start the worker processes before timing
+        move = player.search(DARK_START, LIGHT_START, 0, 'light')
+        print(f"workers {workers}: {player.last_playouts} playouts in {player.last_seconds:.2f}s "
+              f"({player.playouts_per_second:.0f} playouts/s), {len(player.pool)} nodes, move {move[:2]}")
+        player.close()
+
+
+if __name__ == "__main__":
+    main()
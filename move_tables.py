@@ -0,0 +1,65 @@
+# move_tables.py
+# Per-square lookup tables, built once at import so that move generation is nothing but
+# dictionary lookups: no direction lists, no bounds checks, no coordinate arithmetic.
+# Keys are (color, is_king) like the rest of the code base.
+
+ALL_DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+MAN_DIRECTIONS = {'light': ((-1, -1), (-1, 1)), 'dark': ((1, -1), (1, 1))}
+PIECE_KINDS = [(color, is_king) for color in ('dark', 'light') for is_king in (False, True)]
+
+
+def directions_for(color, is_king):
+    return ALL_DIRECTIONS if is_king else MAN_DIRECTIONS[color]
+
+
+def build_tables(size=8):
+    """
+    Returns (neighbors, jumps, promotion_row) for a size x size board:
+    neighbors[kind][pos] is the tuple of squares one diagonal step away,
+    jumps[kind][pos] the tuple of (jumped square, landing square) pairs.
+    """
+    squares = [(row, col) for row in range(size) for col in range(size) if (row + col) % 2 == 1]
+
+    def on_board(row, col):
+        return 0 <= row < size and 0 <= col < size
+
+    neighbors, jumps = {}, {}
+    for kind in PIECE_KINDS:
+        neighbors[kind], jumps[kind] = {}, {}
+        for row, col in squares:
+            steps, hops = [], []
+            for dr, dc in directions_for(*kind):
+                if on_board(row + dr, col + dc):
+                    steps.append((row + dr, col + dc))
+                    if on_board(row + 2 * dr, col + 2 * dc):
+                        hops.append(((row + dr, col + dc), (row + 2 * dr, col + 2 * dc)))
+            neighbors[kind][(row, col)] = tuple(steps)
+            jumps[kind][(row, col)] = tuple(hops)
+    promotion_row = {'light': 0, 'dark': size - 1}
+    return neighbors, jumps, promotion_row
+
+
+def build_rays(size=8):
+    """
+    rays[pos] is one tuple per direction of every square along the diagonal from pos to
+    the edge, nearest first: how far a flying king can look.
+    """
+    rays = {}
+    for row in range(size):
+        for col in range(size):
+            if (row + col) % 2 == 1:
+                rays[(row, col)] = tuple(
+                    tuple((row + k * dr, col + k * dc) for k in range(1, size)
+                          if 0 <= row + k * dr < size and 0 <= col + k * dc < size)
+                    for dr, dc in ALL_DIRECTIONS)
+    return rays
+
+
+def between(start, dest):
+    """The squares strictly between two squares on one diagonal."""
+    dr = 1 if dest[0] > start[0] else -1
+    dc = 1 if dest[1] > start[1] else -1
+    return [(start[0] + k * dr, start[1] + k * dc) for k in range(1, abs(dest[0] - start[0]))]
+
+
+NEIGHBORS, JUMPS, PROMOTION_ROW = build_tables()
@@ -0,0 +1,16 @@
+# notation.py
+# Moves are written with the standard 1-32 square numbers (square_index + 1), so dark
+# starts on 1-12 and light on 21-32: "22-18" is a step, "23x14x5" a capture path.
+from bitboard import SQUARE_POS, square_index
+
+
+def format_move(start, path):
+    separator = 'x' if abs(path[0][0] - start[0]) == 2 else '-'
+    return separator.join(str(square_index(pos) + 1) for pos in [start] + list(path))
+
+
+def parse_move(text):
+    squares = [int(part) - 1 for part in text.replace('x', '-').split('-')]
+    if len(squares) < 2 or not all(0 <= sq < 32 for sq in squares):
+        raise ValueError(f"Not a move: {text}")
+    return SQUARE_POS[squares[0]], [SQUARE_POS[sq] for sq in squares[1:]]
@@ -0,0 +1,149 @@
+# opening_book.py
+# Opening book built from finished games (selfplay.py JSONL, one game per line).
+#
+# Every position reached in the first plies of a game is keyed by its Zobrist hash, the
+# same hash_key the boards keep, and every move played from it gets games/wins/draws
+# counted from the mover's side. The file is a header and fixed 32-byte records sorted by
+# key, so OpeningBook maps it read-only and finds a position by binary search.
+import argparse
+import json
+import mmap
+import random
+import struct
+import sys
+from collections import defaultdict
+
+from bitboard import DARK_START, LIGHT_START, SQUARE_POS, square_index
+from notation import format_move, parse_move
+from pieces import opponent
+from rules_engine import BitboardRulesEngine
+from zobrist import hash_masks
+
+MAGIC = b'CKOB'
+VERSION = 1
+HEADER = struct.Struct('<4sII4x')      # magic, version, record count
+RECORD = struct.Struct('<QBB10sIII')   # key, src, path length, path squares, games, wins, draws
+KEY = struct.Struct('<Q')
+MAX_PATH = 10
+
+
+def read_games(path):
+    """Yields (moves, result) from a JSONL file of game records."""
+    with open(path) as games:
+        for line in games:
+            if line.strip():
+                record = json.loads(line)
+                yield record['moves'], record['result']
+
+
+def collect(games, max_plies=20, rules_engine=None):
+    """Returns {(key, src, path): [games, wins, draws]} over the first max_plies of every game."""
+    rules_engine = rules_engine or BitboardRulesEngine()
+    stats = defaultdict(lambda: [0, 0, 0])
+    for moves, result in games:
+        dark, light, kings, color = DARK_START, LIGHT_START, 0, 'light'
+        for text in moves[:max_plies]:
+            start, path = parse_move(text)
+            played = (square_index(start), tuple(square_index(pos) for pos in path))
+            move = next((move for move in rules_engine.generate_moves(dark, light, kings, color)
+                         if move[:2] == played), None)
+            if move is None or len(move[1]) > MAX_PATH:
+                break  # not a legal move here; the rest of the game is unusable
+            entry = stats[(hash_masks(dark, light, kings, color),) + played]
+            entry[0] += 1
+            if result == color:
+                entry[1] += 1
+            elif result == 'draw':
+                entry[2] += 1
+            dark, light, kings = rules_engine.apply_move(dark, light, kings, color, move)
+            color = opponent(color)
+    return stats
+
+
+def write_book(path, stats, min_games=1):
+    # Within one key the most played move comes first.
+    records = sorted(((key, src, squares, *counts) for (key, src, squares), counts in stats.items()
+                      if counts[0] >= min_games),
+                     key=lambda record: (record[0], -record[3]))
+    with open(path, 'wb') as out:
+        out.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        for key, src, squares, games, wins, draws in records:
+            out.write(RECORD.pack(key, src, len(squares), bytes(squares), games, wins, draws))
+    return len(records)
+
+
+class OpeningBook:
+    """Read-only, memory-mapped view of a file written by write_book()."""
+
+    def __init__(self, path, rng=None):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+        self.rng = rng or random.Random()
+
+    def _key_at(self, i):
+        return KEY.unpack_from(self.data, HEADER.size + i * RECORD.size)[0]
+
+    def lookup(self, key):
+        """Book moves for a position as (start, path, games, wins, draws), most played first."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        while low < self.count and self._key_at(low) == key:
+            _, src, length, squares, games, wins, draws = RECORD.unpack_from(
+                self.data, HEADER.size + low * RECORD.size)
+            entries.append((SQUARE_POS[src], [SQUARE_POS[sq] for sq in squares[:length]], games, wins, draws))
+            low += 1
+        return entries
+
+    def choose(self, board, color, min_games=1):
+        """
+        A legal book move for color, picked at random weighted by how often it scored
+        (wins plus half the draws), or None when the position is out of book.
+        """
+        legal = board.get_legal_moves(color)
+        candidates = [(start, path, wins + draws / 2) for start, path, games, wins, draws in self.lookup(board.hash_key)
+                      if games >= min_games and (start, path) in legal]
+        if not candidates or not any(score for _, _, score in candidates):
+            return None
+        start, path, _ = self.rng.choices(candidates, weights=[score for _, _, score in candidates])[0]
+        return start, path
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect an opening book")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build')
+    build_parser.add_argument('games', nargs='+', help="JSONL game files, e.g. from selfplay.py")
+    build_parser.add_argument('--out', default='opening.book')
+    build_parser.add_argument('--plies', type=int, default=20)
+    build_parser.add_argument('--min-games', type=int, default=2)
+    show_parser = commands.add_parser('show')
+    show_parser.add_argument('--book', default='opening.book')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        games = (game for path in args.games for game in read_games(path))
+        count = write_book(args.out, collect(games, args.plies), args.min_games)
+        print(f"wrote {count} book moves to {args.out}", file=sys.stderr)
+    else:
+        book = OpeningBook(args.book)
+        print(f"{book.count} book moves")
+        for start, path, games, wins, draws in book.lookup(hash_masks(DARK_START, LIGHT_START, 0, 'light')):
+            print(f"{format_move(start, path):>8}  games {games:5d}  wins {wins:5d}  draws {draws:5d}")
+        book.close()
+
+
+if __name__ == "__main__":
+    main()
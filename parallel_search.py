@@ -0,0 +1,124 @@
+# parallel_search.py
+# Root-parallel search: the legal moves at the root are dealt out to worker processes,
+# each of which searches its share on its own BitBoard and transposition table.
+# Positions travel as (dark, light, kings, color) and moves as square numbers, never
+# as pickled Board/Piece objects.
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import BitBoard, SQUARE_POS, board_masks, square_index
+from geometry import STANDARD
+from piece_factory import PieceFactory
+from rules_engine import BitboardRulesEngine
+from search import Searcher
+from transposition_table import TranspositionTable
+
+
+def encode_position(board, color):
+    return board_masks(board) + (color,)
+
+
+def encode_move(move):
+    start, path = move
+    return square_index(start), tuple(square_index(pos) for pos in path)
+
+
+def decode_move(raw_move):
+    src, path = raw_move
+    return SQUARE_POS[src], [SQUARE_POS[sq] for sq in path]
+
+
+_worker = None  # (board, searcher), one per worker process
+
+
+def _init_worker(hash_bits):
+    global _worker
+    rules_engine = BitboardRulesEngine()
+    _worker = (BitBoard(rules_engine, PieceFactory()),
+               Searcher(rules_engine, TranspositionTable(hash_bits)))
+
+
+def _search_share(position, raw_moves, max_depth, time_limit, node_limit):
+    board, searcher = _worker
+    dark, light, kings, color = position
+    board.set_position(dark, light, kings, color)
+    searcher.max_depth, searcher.time_limit, searcher.node_limit = max_depth, time_limit, node_limit
+    searcher.search(board, color, [decode_move(raw) for raw in raw_moves])
+    iterations = [(depth, score, encode_move(move)) for depth, score, move in searcher.iterations]
+    return iterations, searcher.nodes
+
+
+class ParallelSearcher:
+    """
+    Same interface as Searcher. Scores from different workers are only compared at
+    the deepest iteration every worker has finished.
+    """
+
+    def __init__(self, rules_engine, workers, max_depth=64, time_limit=None, node_limit=None, hash_bits=18):
+        if rules_engine.geometry is not STANDARD:
+            raise ValueError("parallel search runs on 8x8 BitBoards only")
+        self.rules_engine = rules_engine
+        self.workers = workers
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(hash_bits,))
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+
+    def search(self, board, color):
+        moves = self.rules_engine.get_legal_moves(board, color)
+        self.nodes = self.depth = self.score = 0
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+
+        position = encode_position(board, color)
+        shares = [moves[i::self.workers] for i in range(min(self.workers, len(moves)))]
+        futures = [self.executor.submit(_search_share, position, [encode_move(m) for m in share],
+                                        self.max_depth, self.time_limit, self.node_limit)
+                   for share in shares]
+        results = [future.result() for future in futures]
+        self.nodes = sum(nodes for _, nodes in results)
+
+        finished = [iterations for iterations, _ in results if iterations]
+        if not finished:
+            return moves[0]
+        self.depth = min(iterations[-1][0] for iterations in finished)
+        candidates = [entry for iterations in finished for entry in iterations if entry[0] == self.depth]
+        _, self.score, raw_move = max(candidates, key=lambda entry: entry[1])
+        return decode_move(raw_move)
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def main(argv=None):
+    from perft import POSITIONS, load_position
+
+    parser = argparse.ArgumentParser(description="Fixed-depth scaling of the root-parallel search")
+    parser.add_argument('--max-workers', type=int, default=4)
+    parser.add_argument('--depth', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rules_engine = BitboardRulesEngine()
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        searcher = ParallelSearcher(rules_engine, workers, max_depth=args.depth)
+        searcher.executor.submit(int).result()  # start the pool outside the timing
+        started = time.perf_counter()
+        nodes = 0
+        for moves, _ in POSITIONS.values():
+            board, color = load_position(BitBoard, rules_engine, moves)
+            searcher.search(board, color)
+            nodes += searcher.nodes
+        seconds = time.perf_counter() - started
+        searcher.close()
+        baseline = baseline or seconds
+        print(f"{workers} workers: {seconds:7.2f}s {nodes:>9} nodes {nodes / seconds:9.0f} nodes/s "
+              f"speedup {baseline / seconds:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
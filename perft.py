@@ -0,0 +1,163 @@
+# perft.py
+# Counts the leaf nodes of the legal move tree. Any RulesEngine can be paired with any
+# board class, so a new engine can be checked against CheckersRulesEngine node for node
+# and timed on the same positions.
+import argparse
+import sys
+import time
+
+from board import Board
+from bitboard import BitBoard
+from geometry import STANDARD
+from notation import parse_move
+from position_format import parse_fen
+from piece_factory import PieceFactory
+from pieces import opponent
+from rules_engine import CheckersRulesEngine, BitboardRulesEngine, InternationalRulesEngine
+from transposition_table import TranspositionTable
+
+ENGINES = {'classic': CheckersRulesEngine, 'bitboard': BitboardRulesEngine,
+           'international': InternationalRulesEngine}
+BOARDS = {'grid': Board, 'bitboard': BitBoard}
+
+# name -> (moves played from the start position, {depth: leaf nodes})
+# Light moves first. The start counts agree with the published English checkers perft.
+POSITIONS = {
+    'start': ([], {1: 7, 2: 49, 3: 302, 4: 1469, 5: 7361, 6: 36768, 7: 179740}),
+    'jumps': (['24-19', '12-16', '19x12', '9-13', '22-18', '13-17', '21x14', '10x17', '23-19',
+               '17-22', '26x17', '11-15', '19x10'],
+              {1: 3, 2: 10, 3: 56, 4: 422, 5: 2548, 6: 18701}),
+    'kings': (['22-17', '11-15', '26-22', '8-11', '24-19', '15x24', '28x19', '10-14', '17x10',
+               '6x15x24', '27x20', '9-13', '32-28', '3-8', '21-17', '12-16', '25-21', '7-10',
+               '28-24', '1-6', '30-26', '5-9', '24-19', '2-7', '19x12x3', '4-8', '3x12', '11-16',
+               '12x19', '10-14', '17x10x1'],
+              {1: 4, 2: 38, 3: 130, 4: 650, 5: 1778, 6: 6790}),
+}
+# The same for international draughts on 10x10, which only runs on the grid board, with
+# positions given as FEN (squares 1-50). The start counts agree with the published
+# international draughts perft; the others were checked against a separate reference
+# generator. 'kings' has flying kings capturing and men crowning on both sides, 'long'
+# has multi-captures of different lengths where only the longest may be played, and in
+# 'crown' the only capture passes over the far row without crowning (13x2x11). A king
+# going round a loop of pieces either way makes one move, not two, as in other perft tools.
+INTERNATIONAL_POSITIONS = {
+    'start': ([], {1: 9, 2: 81, 3: 658, 4: 4265, 5: 27117, 6: 167140}),
+    'kings': ('W:WK4,K5,10,27,38:BK2,K7,11,36,40', {1: 8, 2: 106, 3: 723, 4: 8842, 5: 72343}),
+    'long': ('W:W8,K25,39,45,49:B4,19,42,K46,K48', {1: 13, 2: 59, 3: 474, 4: 3604, 5: 26194, 6: 253106}),
+    'crown': ('W:W13,K46,33,41:B7,8,19,24,K45', {1: 1, 2: 12, 3: 61, 4: 489, 5: 2203, 6: 19048}),
+}
+POSITIONS_BY_ENGINE = {'international': INTERNATIONAL_POSITIONS}
+
+
+def play_move(board, start, path):
+    piece = board.get_piece_at(start)
+    for dest in path:
+        board.move_piece(piece, dest)
+
+
+def perft(board, rules_engine, color, depth, table=None):
+    if depth == 0:
+        return 1
+    if table is not None and depth > 1:
+        entry = table.probe(board.hash_key)
+        if entry is not None and entry[0] == depth:
+            return entry[1]
+    moves = rules_engine.get_legal_moves(board, color)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        nodes += perft(board, rules_engine, opponent(color), depth - 1, table)
+        board.unmake_move()
+    if table is not None:
+        table.store(board.hash_key, depth, nodes)
+    return nodes
+
+
+def perft_masks(board, rules_engine, color, depth, table=None):
+    # Same count on raw square moves, for a BitBoard driven by BitboardRulesEngine.
+    if table is not None and depth > 1:
+        entry = table.probe(board.hash_key)
+        if entry is not None and entry[0] == depth:
+            return entry[1]
+    moves = rules_engine.generate_moves(board.dark, board.light, board.kings, color)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for src, path, _ in moves:
+        board.make_square_move(src, path)
+        nodes += perft_masks(board, rules_engine, opponent(color), depth - 1, table)
+        board.unmake_move()
+    if table is not None:
+        table.store(board.hash_key, depth, nodes)
+    return nodes
+
+
+def load_position(board_class, rules_engine, moves):
+    # moves is a list of moves from the start position, or a FEN string.
+    geometry = rules_engine.geometry
+    if geometry is STANDARD:
+        board = board_class(rules_engine, PieceFactory())
+    else:
+        board = board_class(rules_engine, PieceFactory(), geometry)
+    if isinstance(moves, str):
+        dark, light, kings, color = parse_fen(moves, len(geometry.squares))
+        board.set_position(dark, light, kings, color)
+        return board, color
+    color = 'light'
+    for text in moves:
+        play_move(board, *parse_move(text))
+        color = opponent(color)
+    return board, color
+
+
+def run(engine_name, board_name, max_depth, positions=None, table=None):
+    """Returns (name, depth, nodes, expected, seconds) for every stored count up to max_depth."""
+    rules_engine = ENGINES[engine_name]()
+    stored = POSITIONS_BY_ENGINE.get(engine_name, POSITIONS)
+    results = []
+    for name in positions or stored:
+        if name not in stored:
+            continue
+        moves, expected = stored[name]
+        for depth in sorted(expected):
+            if depth > max_depth:
+                break
+            board, color = load_position(BOARDS[board_name], rules_engine, moves)
+            started = time.perf_counter()
+            if hasattr(rules_engine, 'generate_moves') and hasattr(board, 'make_square_move'):
+                nodes = perft_masks(board, rules_engine, color, depth, table)
+            else:
+                nodes = perft(board, rules_engine, color, depth, table)
+            results.append((name, depth, nodes, expected[depth], time.perf_counter() - started))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move generation perft and regression check")
+    parser.add_argument('--engine', choices=ENGINES, default='classic')
+    parser.add_argument('--board', choices=BOARDS, default='grid')
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--position', action='append', choices=sorted({*POSITIONS, *INTERNATIONAL_POSITIONS}))
+    parser.add_argument('--hash-bits', type=int, default=0,
+                        help="share a 2**N entry transposition table between runs (0 = off)")
+    args = parser.parse_args(argv)
+    if args.engine == 'international' and args.board != 'grid':
+        parser.error("international draughts needs --board grid")
+
+    table = TranspositionTable(args.hash_bits) if args.hash_bits else None
+    failures = 0
+    for name, depth, nodes, expected, seconds in run(args.engine, args.board, args.depth,
+                                                     args.position, table):
+        status = 'ok' if nodes == expected else f'FAIL (expected {expected})'
+        failures += nodes != expected
+        rate = nodes / seconds if seconds else float('inf')
+        print(f"{name:<12} depth {depth:<2} {nodes:>10} nodes {seconds:8.3f}s {rate:12.0f} nodes/s  {status}")
+    if table is not None:
+        print(table.stats())
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
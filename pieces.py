@@ -1,29 +1,77 @@
 from abc import ABC, abstractmethod
+from move_tables import directions_for
+
+# Small-int codes: a piece's code is color * 2 + kind, so 0..3.
+DARK, LIGHT = 0, 1
+MAN, KING = 0, 1
+COLOR_CODES = {'dark': DARK, 'light': LIGHT}
+
+
+def opponent(color):
+    return 'dark' if color == 'light' else 'light'
+
+
+class PieceType:
+    """
+    Immutable flyweight shared by every piece of one (color, kind). Code that keeps the
+    position itself (bitboards, caches, tables) can hold these instead of Piece objects.
+    """
+    __slots__ = ('color', 'is_king', 'code', 'directions')
+
+    def __init__(self, color, is_king):
+        object.__setattr__(self, 'color', color)
+        object.__setattr__(self, 'is_king', is_king)
+        object.__setattr__(self, 'code', COLOR_CODES[color] * 2 + (KING if is_king else MAN))
+        object.__setattr__(self, 'directions', directions_for(color, is_king))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PieceType is immutable")
+
+    def __repr__(self):
+        return f"PieceType({self.color!r}, {'king' if self.is_king else 'man'})"
+
+
+PIECE_TYPES = [PieceType(color, is_king) for color in ('dark', 'light') for is_king in (False, True)]
+
+
+def piece_type(color, is_king):
+    return PIECE_TYPES[COLOR_CODES[color] * 2 + (KING if is_king else MAN)]
+
 
 class Piece(ABC):                                       # Inheritance, Polymorphism
+    # No per-instance __dict__: a piece is just its color and where it stands.
+    # Crowning swaps the class to King, so is_king is a class attribute.
+    __slots__ = ('color', 'position')
+    is_king = False
+
     def __init__(self, color, position):
         self.color = color
         self.position = position
-        self.is_king = False
 
     @abstractmethod
     def get_valid_moves(self, board):
         pass
 
     def make_king(self):
-        self.is_king = True
+        self.__class__ = King
+
+    def unmake_king(self):
+        self.__class__ = Man
 
     def get_directions(self):
-        if self.is_king:
-            return [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        return [(-1, -1), (-1, 1)] if self.color == 'light' else [(1, -1), (1, 1)]
+        return directions_for(self.color, self.is_king)
 
 
 class Man(Piece):
+    __slots__ = ()
+
     def get_valid_moves(self, board):
         return board.get_valid_moves(self)
 
 
 class King(Piece):
+    __slots__ = ()
+    is_king = True
+
     def get_valid_moves(self, board):
         return board.get_valid_moves(self)
@@ -1,12 +1,50 @@
 # player.py
+import asyncio
+
+
 class Player:
     def __init__(self, color, rules_engine):
         self.color = color
-        self.pieces = []
         self.rules_engine = rules_engine
 
+    def get_pieces(self, board):
+        return board.get_pieces(self.color)
+
     def has_moves(self, board):
-        return any(self.rules_engine.get_valid_moves(board, piece) for piece in self.pieces)
+        return bool(board.get_legal_moves(self.color))
 
     def get_pieces_with_captures(self, board):
-        return [p for p in self.pieces if self.rules_engine.get_all_captures(board, p)]
\ No newline at end of file
+        # Captures are mandatory, so the legal moves are either all captures or none are.
+        pieces = []
+        for start, path in board.get_legal_moves(self.color):
+            if self.rules_engine.is_jump_move(start, path[0], board):
+                piece = board.get_piece_at(start)
+                if piece not in pieces:
+                    pieces.append(piece)
+        return pieces
+
+    def get_move(self, board, ui_adapter):
+        # A human player is asked through the UI; other players override this.
+        return ui_adapter.get_move(board, self)
+
+    def start_pondering(self, board, color):
+        # Called by Match while the opponent (color) thinks about its move; players that
+        # can make use of the time override this and stop_pondering.
+        pass
+
+    def stop_pondering(self, board):
+        # Called once the opponent's move is on the board (or the game ended).
+        pass
+
+    def close(self):
+        # Called once the player is no longer needed; players with worker processes shut them down here.
+        pass
+
+    async def get_move_async(self, board, ui_adapter, executor=None):
+        # The event-loop version of get_move. A human answers through the async UI adapter;
+        # computer players override get_move and are run in the executor, so the loop keeps
+        # serving other games while they think.
+        if type(self).get_move is Player.get_move:
+            return await ui_adapter.get_move(board, self)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.get_move, board, ui_adapter)
@@ -0,0 +1,92 @@
+# position_format.py
+# Positions in and out of the program, as (dark, light, kings, color).
+#
+# Text is PDN FEN: "<side>:W<light squares>:B<dark squares>", squares numbered 1-32 as in
+# notation.py, "K" in front of a king, ranges like "1-12" accepted on input. Light is
+# White and dark is Black, so the start position is "W:W21-32:B1-12".
+#
+# Binary is four little-endian uint32 per position: dark, light, kings, side (0 dark,
+# 1 light). Fixed 16-byte records line up as an N x 4 uint32 array, so whole files
+# decode in one NumPy call when NumPy is installed.
+import struct
+
+from bitboard import NUM_SQUARES, board_masks
+from pieces import COLOR_CODES, DARK
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RECORD = struct.Struct('<4I')
+RECORD_SIZE = RECORD.size
+SIDE_LETTERS = {'light': 'W', 'dark': 'B'}
+LETTER_SIDES = {'W': 'light', 'B': 'dark'}
+
+
+def to_fen(dark, light, kings, color):
+    fields = [SIDE_LETTERS[color]]
+    for letter, mask in (('W', light), ('B', dark)):
+        squares = [('K' if kings >> sq & 1 else '') + str(sq + 1) for sq in range(NUM_SQUARES) if mask >> sq & 1]
+        fields.append(letter + ','.join(squares))
+    return ':'.join(fields)
+
+
+def parse_fen(text, num_squares=NUM_SQUARES):
+    # num_squares is 50 for a 10x10 position (see geometry.py); the masks then have 50 bits.
+    fields = text.strip().rstrip('.').split(':')
+    if not fields or fields[0].upper() not in LETTER_SIDES:
+        raise ValueError(f"Not a FEN position: {text}")
+    color = LETTER_SIDES[fields[0].upper()]
+    masks = {'W': 0, 'B': 0}
+    kings = 0
+    for field in fields[1:]:
+        letter, squares = field[:1].upper(), field[1:]
+        if letter not in masks:
+            raise ValueError(f"Bad FEN field: {field}")
+        for item in filter(None, squares.split(',')):
+            is_king = item[0].upper() == 'K'
+            first, _, last = item.lstrip('Kk').partition('-')
+            for number in range(int(first), int(last or first) + 1):
+                if not 1 <= number <= num_squares:
+                    raise ValueError(f"Bad square {number} in {text}")
+                masks[letter] |= 1 << (number - 1)
+                if is_king:
+                    kings |= 1 << (number - 1)
+    if masks['W'] & masks['B']:
+        raise ValueError(f"Square given to both sides in {text}")
+    return masks['B'], masks['W'], kings, color
+
+
+def pack_position(dark, light, kings, color):
+    return RECORD.pack(dark, light, kings, COLOR_CODES[color])
+
+
+def unpack_position(data, offset=0):
+    dark, light, kings, side = RECORD.unpack_from(data, offset)
+    return dark, light, kings, 'dark' if side == DARK else 'light'
+
+
+def pack_positions(positions):
+    """Bulk encode. positions is an N x 4 uint32 array, or an iterable of (dark, light, kings, color)."""
+    if np is not None and isinstance(positions, np.ndarray):
+        return positions.astype('<u4', copy=False).tobytes()
+    return b''.join(pack_position(*position) for position in positions)
+
+
+def unpack_positions(data):
+    """Bulk decode: an N x 4 uint32 array with NumPy, otherwise a list of (dark, light, kings, color)."""
+    if np is not None:
+        return np.frombuffer(data, dtype='<u4').reshape(-1, 4)
+    return [unpack_position(data, offset) for offset in range(0, len(data), RECORD_SIZE)]
+
+
+def board_to_fen(board, color):
+    return to_fen(*board_masks(board), color)
+
+
+def load_fen(board, text):
+    """Sets board up from a FEN string and returns the side to move."""
+    dark, light, kings, color = parse_fen(text)
+    board.set_position(dark, light, kings, color)
+    return color
@@ -1,5 +1,8 @@
 # rules_engine.py
 from abc import ABC, abstractmethod
+from bitboard import FULL_MASK, JUMPED_SQUARE, PROMOTION_MASK, SQUARE_POS, board_masks, square_index
+from geometry import INTERNATIONAL, STANDARD
+from move_tables import NEIGHBORS, between
 
 class RulesEngine(ABC):
     @abstractmethod
@@ -13,8 +16,26 @@ class RulesEngine(ABC):
     @abstractmethod
     def is_promotion_move(self, board, piece, dest):
         pass
-    
+
+    def get_legal_moves(self, board, color):
+        """
+        Every legal (start, path) for one side, with captures mandatory across all pieces.
+        Engines that can see the whole side at once should override this.
+        """
+        pieces = list(board.get_pieces(color))
+        captures = [(p.position, path) for p in pieces for path in self.get_all_captures(board, p)]
+        if captures:
+            return captures
+        return [(p.position, [dest]) for p in pieces for dest in self.get_valid_moves(board, p)]
+
 class CheckersRulesEngine(RulesEngine):
+    def __init__(self, geometry=STANDARD):
+        # English rules work on any geometry; the board passed in must share it.
+        self.geometry = geometry
+        self.neighbors = geometry.neighbors
+        self.jumps = geometry.jumps
+        self.promotion_row = geometry.promotion_row
+
     def get_valid_moves(self, board, piece):
         captures = self.get_all_captures(board, piece)
         if captures:
@@ -22,15 +43,8 @@ class CheckersRulesEngine(RulesEngine):
         return self._get_simple_moves(board, piece)
 
     def _get_simple_moves(self, board, piece):
-        moves = []
-        directions = piece.get_directions()
-        row, col = piece.position
-        
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            if board.in_bounds((r, c)) and board.get_piece_at((r, c)) is None:
-                moves.append((r, c))
-        return moves
+        neighbors = self.neighbors[(piece.color, piece.is_king)][piece.position]
+        return [pos for pos in neighbors if board.get_piece_at(pos) is None]
 
     def get_all_captures(self, board, piece, position=None, visited=None):
         """
@@ -44,39 +58,362 @@ class CheckersRulesEngine(RulesEngine):
             visited = set()
         
         captures = []
-        row, col = position
-        directions = piece.get_directions()
-
-        for dr, dc in directions:
-            mid_r, mid_c = row + dr, col + dc
-            end_r, end_c = row + 2 * dr, col + 2 * dc
-            
-            if not board.in_bounds((end_r, end_c)) or not board.in_bounds((mid_r, mid_c)):
-                continue
-                
-            jumped_piece = board.get_piece_at((mid_r, mid_c))
-            landing_spot = board.get_piece_at((end_r, end_c))
+        for mid, end in self.jumps[(piece.color, piece.is_king)][position]:
+            jumped_piece = board.get_piece_at(mid)
 
-            if jumped_piece and jumped_piece.color != piece.color and landing_spot is None:
-                if (mid_r, mid_c) in visited:
-                    continue
-                
+            if jumped_piece and jumped_piece.color != piece.color and mid not in visited \
+                    and board.get_piece_at(end) is None:
                 # Recursively find subsequent jumps from the new position
-                next_visited = visited.copy()
-                next_visited.add((mid_r, mid_c))
-                sub_captures = self.get_all_captures(board, piece, (end_r, end_c), next_visited)
+                visited.add(mid)
+                sub_captures = self.get_all_captures(board, piece, end, visited)
+                visited.discard(mid)
                 
                 if sub_captures:
                     for path in sub_captures:
-                        captures.append([(end_r, end_c)] + path)
+                        captures.append([end] + path)
                 else:
-                    captures.append([(end_r, end_c)])
+                    captures.append([end])
     
-        return captures if captures else []
+        return captures
 
     def is_promotion_move(self, board, piece, dest):
-        end_row, _ = dest
-        return (piece.color == 'light' and end_row == 0) or (piece.color == 'dark' and end_row == 7)
+        return dest[0] == self.promotion_row[piece.color]
+
+    def is_jump_move(self, start_pos, dest_pos, board=None):
+        return abs(start_pos[0] - dest_pos[0]) == 2
+
+
+class InternationalRulesEngine(CheckersRulesEngine):
+    """
+    International draughts on 10x10. Men step forward but capture backwards too, kings
+    fly: they move any distance along an open diagonal and capture a piece however far
+    away, landing on any empty square behind it. Of all the captures on the board only
+    those taking the most pieces may be played. Jumped pieces stay on the board until
+    the move is over, so they block and cannot be taken twice, and a man is crowned only
+    when its move ends on the far row.
+
+    Everything is walked on the geometry's precomputed tables (neighbors, jumps, rays).
+    """
+
+    def __init__(self, geometry=INTERNATIONAL):
+        super().__init__(geometry)
+        self.rays = geometry.rays
+
+    def get_legal_moves(self, board, color):
+        pieces = list(board.get_pieces(color))
+        captures = [(p.position, path) for p in pieces for path in self.get_all_captures(board, p)]
+        if captures:
+            most = max(len(path) for _, path in captures)
+            return self._distinct(board, [move for move in captures if len(move[1]) == most])
+        return [(p.position, [dest]) for p in pieces for dest in self._get_simple_moves(board, p)]
+
+    def get_valid_moves(self, board, piece):
+        captures = self.get_all_captures(board, piece)
+        if captures:
+            most = max(len(path) for path in captures)
+            start = piece.position
+            return [path for _, path in self._distinct(board, [(start, path) for path in captures if len(path) == most])]
+        return self._get_simple_moves(board, piece)
+
+    def _distinct(self, board, captures):
+        # A king can go round a closed loop of pieces either way. Both ways start and end on
+        # the same squares and take the same pieces, so they are one move: keep the first.
+        seen = set()
+        moves = []
+        for start, path in captures:
+            taken = set()
+            pos = start
+            for dest in path:
+                taken.update(sq for sq in between(pos, dest) if sq != start and board.get_piece_at(sq) is not None)
+                pos = dest
+            key = (start, path[-1], frozenset(taken))
+            if key not in seen:
+                seen.add(key)
+                moves.append((start, path))
+        return moves
+
+    def _get_simple_moves(self, board, piece):
+        if not piece.is_king:
+            return super()._get_simple_moves(board, piece)
+        moves = []
+        for ray in self.rays[piece.position]:
+            for pos in ray:
+                if board.get_piece_at(pos) is not None:
+                    break
+                moves.append(pos)
+        return moves
+
+    def get_all_captures(self, board, piece, position=None, visited=None):
+        """
+        Every complete capture path for the piece, however many pieces it takes; the
+        maximum-capture rule is applied by get_legal_moves. The piece's own starting
+        square counts as empty.
+        """
+        if position is None:
+            position = piece.position
+        if visited is None:
+            visited = set()
 
-    def is_jump_move(self, start_pos, dest_pos):
-        return abs(start_pos[0] - dest_pos[0]) == 2
\ No newline at end of file
+        captures = []
+        if not piece.is_king:
+            for mid, end in self.jumps[(piece.color, True)][position]:
+                jumped_piece = board.get_piece_at(mid)
+                if jumped_piece and jumped_piece.color != piece.color and mid not in visited:
+                    landing = board.get_piece_at(end)
+                    if landing is None or landing is piece:
+                        visited.add(mid)
+                        self._extend(board, piece, end, visited, captures)
+                        visited.discard(mid)
+            return captures
+
+        for ray in self.rays[position]:
+            for i, mid in enumerate(ray):
+                jumped_piece = board.get_piece_at(mid)
+                if jumped_piece is None or jumped_piece is piece:
+                    continue
+                if jumped_piece.color != piece.color and mid not in visited:
+                    visited.add(mid)
+                    for end in ray[i + 1:]:
+                        landing = board.get_piece_at(end)
+                        if landing is not None and landing is not piece:
+                            break
+                        self._extend(board, piece, end, visited, captures)
+                    visited.discard(mid)
+                break  # the first piece along the ray ends the search either way
+        return captures
+
+    def _extend(self, board, piece, end, visited, captures):
+        sub_captures = self.get_all_captures(board, piece, end, visited)
+        if sub_captures:
+            for path in sub_captures:
+                captures.append([end] + path)
+        else:
+            captures.append([end])
+
+    def is_promotion_move(self, board, piece, dest):
+        # Board asks before each step is made, so the man is still on the square it jumps
+        # from and the piece it jumps is still on the board.
+        if piece.is_king or dest[0] != self.promotion_row[piece.color]:
+            return False
+        row, col = piece.position
+        if abs(dest[0] - row) == 1:
+            return True
+        # A capture passing over the far row goes on if it can, and then crowns nothing.
+        mid = ((row + dest[0]) // 2, (col + dest[1]) // 2)
+        return not self.get_all_captures(board, piece, dest, {mid})
+
+    def is_jump_move(self, start_pos, dest_pos, board=None):
+        # A king's plain move can be long as well, so only the board can tell.
+        return any(board.get_piece_at(pos) is not None for pos in between(start_pos, dest_pos))
+
+# Shift-and-mask tables for BitboardRulesEngine (square numbering is described in bitboard.py).
+# Odd and even rows are offset by half a square, so a diagonal step is two (source mask, shift)
+# parts, one per row parity. Directions are indexed in the order Piece.get_directions uses.
+EVEN_ROWS = 0x0F0F0F0F
+ODD_ROWS = 0xF0F0F0F0
+LEFT_EDGE = 0x10101010   # column 0
+RIGHT_EDGE = 0x08080808  # column 7
+
+UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT = range(4)
+ALL_DIRECTIONS = (UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT)
+FORWARD = {'light': (UP_LEFT, UP_RIGHT), 'dark': (DOWN_LEFT, DOWN_RIGHT)}
+STEPS = (
+    ((EVEN_ROWS, -4), (ODD_ROWS & ~LEFT_EDGE, -5)),
+    ((EVEN_ROWS & ~RIGHT_EDGE, -3), (ODD_ROWS, -4)),
+    ((EVEN_ROWS, 4), (ODD_ROWS & ~LEFT_EDGE, 3)),
+    ((EVEN_ROWS & ~RIGHT_EDGE, 5), (ODD_ROWS, 4)),
+)
+JUMP_SHIFTS = (-9, -7, 7, 9)
+
+
+def shift_mask(mask, shift):
+    return (mask << shift) & FULL_MASK if shift > 0 else mask >> -shift
+
+
+def step_mask(mask, direction):
+    (mask_a, shift_a), (mask_b, shift_b) = STEPS[direction]
+    return shift_mask(mask & mask_a, shift_a) | shift_mask(mask & mask_b, shift_b)
+
+
+SHIFT_3_OR_5 = EVEN_ROWS & ~RIGHT_EDGE  # may step up by 3 or down by 5
+SHIFT_5_OR_3 = ODD_ROWS & ~LEFT_EDGE   # may step up by 5 or down by 3
+
+
+def _build_simple_table(shift):
+    # Ready-made raw moves keyed by destination bit, so the generator never builds them.
+    table = {}
+    for src, pos in enumerate(SQUARE_POS):
+        dst = src + shift
+        if 0 <= dst < 32 and SQUARE_POS[dst] in NEIGHBORS[('dark', True)][pos]:
+            table[1 << dst] = (src, (dst,), 0)
+    return table
+
+
+def _build_jump_table(shift):
+    table = {}
+    for src in range(32):
+        dst = src + shift
+        if 0 <= dst < 32 and (src << 5) | dst in JUMPED_SQUARE:
+            table[1 << dst] = (src, dst, 1 << JUMPED_SQUARE[(src << 5) | dst])
+    return table
+
+
+UP_MOVES = tuple(_build_simple_table(-shift) for shift in (3, 4, 5))
+DOWN_MOVES = tuple(_build_simple_table(shift) for shift in (3, 4, 5))
+JUMP_MOVES = tuple(_build_jump_table(shift) for shift in JUMP_SHIFTS)
+# (src, path) -> the same move as (start, path tuple) positions, shared between calls and
+# filled in as moves come up: a board has only so many of them. Callers get a fresh path
+# list each time, so nothing they do to a move reaches the shared entry.
+CONVERTED_MOVES = {}
+
+
+class BitboardRulesEngine(CheckersRulesEngine):
+    """
+    Generates the moves of a whole side with a handful of mask shifts instead of walking
+    one piece at a time. Works with any board: BitBoard hands over its masks directly,
+    other boards are scanned once per call.
+
+    Raw moves are (src, path, captured) where src and path are square numbers and
+    captured is the mask of squares jumped over.
+    """
+
+    def generate_moves(self, dark, light, kings, color, movers=FULL_MASK):
+        empty = ~(dark | light) & FULL_MASK
+        if color == 'dark':
+            own, enemy = dark & movers, light
+            up, down = own & kings, own
+        else:
+            own, enemy = light & movers, dark
+            up, down = own, own & kings
+
+        moves = []
+        own_kings = own & kings
+        if up:
+            jumped = ((up & EVEN_ROWS) >> 4 | (up & SHIFT_5_OR_3) >> 5) & enemy
+            if jumped:
+                landings = ((jumped & EVEN_ROWS) >> 4 | (jumped & SHIFT_5_OR_3) >> 5) & empty
+                if landings:
+                    self._jumps(landings, JUMP_MOVES[UP_LEFT], own_kings, color, enemy, empty, moves)
+            jumped = ((up & SHIFT_3_OR_5) >> 3 | (up & ODD_ROWS) >> 4) & enemy
+            if jumped:
+                landings = ((jumped & SHIFT_3_OR_5) >> 3 | (jumped & ODD_ROWS) >> 4) & empty
+                if landings:
+                    self._jumps(landings, JUMP_MOVES[UP_RIGHT], own_kings, color, enemy, empty, moves)
+        if down:
+            jumped = ((down & EVEN_ROWS) << 4 | (down & SHIFT_5_OR_3) << 3) & enemy
+            if jumped:
+                landings = ((jumped & EVEN_ROWS) << 4 | (jumped & SHIFT_5_OR_3) << 3) & empty
+                if landings:
+                    self._jumps(landings, JUMP_MOVES[DOWN_LEFT], own_kings, color, enemy, empty, moves)
+            jumped = ((down & SHIFT_3_OR_5) << 5 | (down & ODD_ROWS) << 4) & enemy
+            if jumped:
+                landings = ((jumped & SHIFT_3_OR_5) << 5 | (jumped & ODD_ROWS) << 4) & empty
+                if landings:
+                    self._jumps(landings, JUMP_MOVES[DOWN_RIGHT], own_kings, color, enemy, empty, moves)
+        if moves:
+            return moves
+
+        # No capture anywhere: every piece steps by 4 plus 3 or 5 depending on its row.
+        append = moves.append
+        if up:
+            up_3, up_4, up_5 = UP_MOVES
+            targets = (up & SHIFT_3_OR_5) >> 3 & empty
+            while targets:
+                low = targets & -targets
+                targets ^= low
+                append(up_3[low])
+            targets = up >> 4 & empty
+            while targets:
+                low = targets & -targets
+                targets ^= low
+                append(up_4[low])
+            targets = (up & SHIFT_5_OR_3) >> 5 & empty
+            while targets:
+                low = targets & -targets
+                targets ^= low
+                append(up_5[low])
+        if down:
+            down_3, down_4, down_5 = DOWN_MOVES
+            targets = (down & SHIFT_5_OR_3) << 3 & empty
+            while targets:
+                low = targets & -targets
+                targets ^= low
+                append(down_3[low])
+            targets = down << 4 & empty
+            while targets:
+                low = targets & -targets
+                targets ^= low
+                append(down_4[low])
+            targets = (down & SHIFT_3_OR_5) << 5 & empty
+            while targets:
+                low = targets & -targets
+                targets ^= low
+                append(down_5[low])
+        return moves
+
+    def _jumps(self, landings, table, own_kings, color, enemy, empty, moves):
+        while landings:
+            low = landings & -landings
+            landings ^= low
+            src, dst, captured = table[low]
+            directions = ALL_DIRECTIONS if own_kings >> src & 1 else FORWARD[color]
+            self._continue_jumps(src, (dst,), captured, directions, enemy, empty, moves)
+
+    def _continue_jumps(self, src, path, captured, directions, enemy, empty, moves):
+        # Jumped pieces stay on the board until the move is over, and so does the mover's
+        # own starting square, exactly as CheckersRulesEngine.get_all_captures sees them.
+        here = 1 << path[-1]
+        extended = False
+        for direction in directions:
+            (mask_a, shift_a), (mask_b, shift_b) = STEPS[direction]
+            if shift_a > 0:
+                jumped = (here & mask_a) << shift_a | (here & mask_b) << shift_b
+                jumped &= enemy & ~captured
+                landing = ((jumped & mask_a) << shift_a | (jumped & mask_b) << shift_b) & empty
+            else:
+                jumped = (here & mask_a) >> -shift_a | (here & mask_b) >> -shift_b
+                jumped &= enemy & ~captured
+                landing = ((jumped & mask_a) >> -shift_a | (jumped & mask_b) >> -shift_b) & empty
+            if landing:
+                extended = True
+                self._continue_jumps(src, path + (landing.bit_length() - 1,), captured | jumped,
+                                     directions, enemy, empty, moves)
+        if not extended:
+            moves.append((src, path, captured))
+
+    def apply_move(self, dark, light, kings, color, move):
+        """Plays a raw move on the masks and returns the new (dark, light, kings)."""
+        src, path, captured = move
+        dst = path[-1]
+        moved = 1 << src | 1 << dst
+        if kings >> src & 1:
+            kings ^= moved
+        elif PROMOTION_MASK[color] >> dst & 1:
+            kings |= 1 << dst
+        if color == 'dark':
+            return dark ^ moved, light & ~captured, kings & ~captured
+        return dark & ~captured, light ^ moved, kings & ~captured
+
+    def get_legal_moves(self, board, color):
+        dark, light, kings = board_masks(board)
+        moves = []
+        for src, path, _ in self.generate_moves(dark, light, kings, color):
+            move = CONVERTED_MOVES.get((src, path))
+            if move is None:
+                move = CONVERTED_MOVES[(src, path)] = (SQUARE_POS[src], tuple(SQUARE_POS[sq] for sq in path))
+            moves.append((move[0], list(move[1])))
+        return moves
+
+    def get_valid_moves(self, board, piece):
+        dark, light, kings = board_masks(board)
+        moves = self.generate_moves(dark, light, kings, piece.color, 1 << square_index(piece.position))
+        if moves and not moves[0][2]:
+            return [SQUARE_POS[path[0]] for _, path, _ in moves]
+        return [[SQUARE_POS[sq] for sq in path] for _, path, _ in moves]
+
+    def get_all_captures(self, board, piece, position=None, visited=None):
+        if position is not None or visited is not None:
+            return super().get_all_captures(board, piece, position, visited)
+        dark, light, kings = board_masks(board)
+        moves = self.generate_moves(dark, light, kings, piece.color, 1 << square_index(piece.position))
+        return [[SQUARE_POS[sq] for sq in path] for _, path, captured in moves if captured]
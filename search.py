@@ -0,0 +1,214 @@
+# search.py
+# Negamax alpha-beta with iterative deepening over any board that supports
+# make_move/unmake_move and keeps a Zobrist hash_key.
+import time
+
+from bitboard import board_masks
+from evaluation import evaluate
+from pieces import opponent
+from tablebase import DRAW, WIN
+from transposition_table import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
+
+WIN_SCORE = 100000
+MAX_PLY = 128
+CHECK_EVERY = 1024  # nodes between two looks at the clock
+# A tablebase win ranks below any found mate; the evaluation added on top keeps the
+# winning side making progress.
+TABLEBASE_WIN = WIN_SCORE // 2
+# Beyond this a score is a found mate or a tablebase result, far above any evaluation.
+DECISIVE_SCORE = TABLEBASE_WIN // 2
+
+
+class SearchAborted(Exception):
+    pass
+
+
+def move_key(move):
+    start, path = move
+    return (start, tuple(path))
+
+
+def score_to_table(score, ply):
+    # Decisive scores count plies from the root; the table counts them from the position
+    # itself, so they stay right when the position comes up again at another ply.
+    if score >= DECISIVE_SCORE:
+        return score + ply
+    if score <= -DECISIVE_SCORE:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    if score >= DECISIVE_SCORE:
+        return score - ply
+    if score <= -DECISIVE_SCORE:
+        return score + ply
+    return score
+
+
+class Searcher:
+    """
+    Searches until max_depth is reached or the time/node budget runs out, and always
+    answers with the best move of the deepest finished iteration.
+    Move ordering: hash move, longer captures, killer moves, then history scores.
+    With a tablebase, positions it covers are scored from it instead of being searched.
+    """
+
+    def __init__(self, rules_engine, table=None, max_depth=64, time_limit=None, node_limit=None,
+                 tablebase=None):
+        self.rules_engine = rules_engine
+        self.table = table if table is not None else TranspositionTable()
+        self.tablebase = tablebase
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.iterations = []
+        self.stop_requested = False
+
+    def search(self, board, color, root_moves=None):
+        """
+        Returns the best move for color. root_moves restricts the search to some of the
+        legal moves (every one of them is then searched, even if it is the only one).
+        """
+        moves = root_moves if root_moves is not None else self.rules_engine.get_legal_moves(board, color)
+        if not moves:
+            return None
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.iterations = []  # (depth, score, best move) of every finished iteration
+        self.stop_requested = False
+        self.deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self.history = {}
+        self.table.new_search()
+
+        best_move = moves[0]
+        if len(moves) == 1 and root_moves is None:
+            return best_move
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self._root(board, color, moves, depth)
+            except SearchAborted:
+                break
+            best_move, self.score, self.depth = move, score, depth
+            self.iterations.append((depth, score, move))
+            if abs(score) >= WIN_SCORE - MAX_PLY:
+                break
+        return best_move
+
+    def stop(self):
+        self.stop_requested = True
+
+    def _root(self, board, color, moves, depth):
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_move = None
+        entry = self.table.probe(board.hash_key)
+        for move in self._ordered(moves, entry[3] if entry is not None else None, 0):
+            board.make_move(move)
+            try:
+                score = -self._negamax(board, opponent(color), depth - 1, -beta, -alpha, 1)
+            finally:
+                board.unmake_move()
+            if best_move is None or score > alpha:
+                alpha, best_move = score, move
+        self.table.store(board.hash_key, depth, alpha, EXACT, move_key(best_move))
+        return alpha, best_move
+
+    def _negamax(self, board, color, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0:
+            self._check_budget()
+
+        key = board.hash_key
+        entry = self.table.probe(key)
+        hash_move = None
+        if entry is not None:
+            entry_depth, value, flag, hash_move, _ = entry
+            value = score_from_table(value, ply)
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER_BOUND and value >= beta:
+                    return value
+                if flag == UPPER_BOUND and value <= alpha:
+                    return value
+
+        if self.tablebase is not None and board.piece_count() <= self.tablebase.max_pieces:
+            result = self.tablebase.probe(*board_masks(board), color)
+            if result == DRAW:
+                return 0
+            if result is not None:
+                score = TABLEBASE_WIN - ply if result == WIN else ply - TABLEBASE_WIN
+                return score + evaluate(board, color)
+
+        moves = self.rules_engine.get_legal_moves(board, color)
+        if not moves:
+            return -WIN_SCORE + ply
+        start, path = moves[0]
+        is_capture = self.rules_engine.is_jump_move(start, path[0], board)
+        # Captures are forced, so a position with one pending is searched on rather than scored.
+        if (depth <= 0 and not is_capture) or ply >= MAX_PLY:
+            return evaluate(board, color)
+
+        original_alpha = alpha
+        best_score, best_move = -WIN_SCORE - 1, None
+        for move in self._ordered(moves, hash_move, ply):
+            board.make_move(move)
+            try:
+                score = -self._negamax(board, opponent(color), depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move()
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not is_capture:
+                    self._remember_cutoff(move, depth, ply)
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.table.store(key, depth, score_to_table(best_score, ply), flag, move_key(best_move))
+        return best_score
+
+    def _ordered(self, moves, hash_move, ply):
+        if len(moves) == 1:
+            return moves
+        killers = self.killers[ply]
+        history = self.history
+
+        def priority(move):
+            key = move_key(move)
+            if key == hash_move:
+                return 1 << 30
+            score = len(move[1]) << 20
+            if key == killers[0] or key == killers[1]:
+                score += 1 << 19
+            return score + history.get(key, 0)
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def _remember_cutoff(self, move, depth, ply):
+        key = move_key(move)
+        killers = self.killers[ply]
+        if killers[0] != key:
+            killers[1] = killers[0]
+            killers[0] = key
+        self.history[key] = min(self.history.get(key, 0) + depth * depth, (1 << 19) - 1)
+
+    def _check_budget(self):
+        if self.stop_requested:
+            raise SearchAborted()
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchAborted()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchAborted()
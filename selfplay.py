@@ -0,0 +1,122 @@
+# selfplay.py
+# Headless engine-vs-engine / random-vs-random games, fanned out over worker processes
+# and streamed to a JSONL file one finished game per line.
+import argparse
+import json
+import random
+import sys
+import time
+
+from bitboard import BitBoard
+from board import Board
+from engine_player import EnginePlayer
+from match import Match
+from mcts import MCTSPlayer
+from notation import format_move
+from piece_factory import PieceFactory
+from pieces import opponent
+from player import Player
+from rules_engine import BitboardRulesEngine, CheckersRulesEngine
+from transposition_table import TranspositionTable
+from worker_pool import map_unordered
+
+
+class RandomPlayer(Player):
+    def __init__(self, color, rules_engine, seed=None):
+        super().__init__(color, rules_engine)
+        self.rng = random.Random(seed)
+
+    def get_move(self, board, ui_adapter):
+        start, path = self.rng.choice(board.get_legal_moves(self.color))
+        return board.get_piece_at(start), path
+
+
+class HeadlessMatch(Match):
+    """A Match that plays itself out with no UI and no printing."""
+
+    def play(self, max_plies=300):
+        """Returns (winning color or 'draw', moves in 1-32 notation); 'draw' means max_plies ran out."""
+        moves = []
+        while len(moves) < max_plies:
+            current_player = self.players[self.current_player_index]
+            if not current_player.has_moves(self.board):
+                return opponent(current_player.color), moves
+            piece, move_path = current_player.get_move(self.board, None)
+            moves.append(format_move(piece.position, move_path))
+            for dest_pos in move_path:
+                self.board.move_piece(piece, dest_pos)
+            self.switch_turn()
+        return 'draw', moves
+
+
+def make_player(spec, color, rules_engine, seed, table=None, time_limit=None):
+    # spec is 'random', 'engine[:depth]' or 'mcts[:playouts]'; table, if given, is the engine's
+    # transposition table instead of a fresh one, and time_limit caps the seconds per move.
+    kind, _, depth = spec.partition(':')
+    if kind == 'random':
+        return RandomPlayer(color, rules_engine, seed)
+    if kind == 'engine':
+        return EnginePlayer(color, rules_engine, max_depth=int(depth or 4), time_limit=time_limit,
+                            table=table if table is not None else TranspositionTable(16))
+    if kind == 'mcts':
+        return MCTSPlayer(color, rules_engine, playouts=int(depth or 1000), time_limit=time_limit, seed=seed)
+    raise ValueError(f"Unknown player: {spec}")
+
+
+def play_game(game_id, dark_spec, light_spec, seed, max_plies, classic=False):
+    # classic plays on the grid Board with CheckersRulesEngine instead of the bitboard pair.
+    if classic:
+        rules_engine = CheckersRulesEngine()
+        board = Board(rules_engine, PieceFactory())
+    else:
+        rules_engine = BitboardRulesEngine()
+        board = BitBoard(rules_engine, PieceFactory())
+    players = [make_player(dark_spec, 'dark', rules_engine, seed),
+               make_player(light_spec, 'light', rules_engine, seed + 1)]
+    started = time.perf_counter()
+    result, moves = HeadlessMatch(board, players).play(max_plies)
+    return {
+        'game': game_id,
+        'dark': dark_spec,
+        'light': light_spec,
+        'result': result,
+        'plies': len(moves),
+        'seconds': round(time.perf_counter() - started, 4),
+        'moves': moves,
+    }
+
+
+def run_games(games, dark_spec, light_spec, seed=0, max_plies=300, workers=1):
+    """Yields game records as they finish; at most 2 * workers games are in flight."""
+    jobs = ((game_id, dark_spec, light_spec, seed + 2 * game_id, max_plies) for game_id in range(games))
+    return map_unordered(play_game, jobs, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless self-play to JSONL")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--dark', default='random', help="'random', 'engine[:depth]' or 'mcts[:playouts]'")
+    parser.add_argument('--light', default='random', help="'random', 'engine[:depth]' or 'mcts[:playouts]'")
+    parser.add_argument('--max-plies', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='-', help="output file, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout if args.out == '-' else open(args.out, 'w')
+    started = time.perf_counter()
+    count = 0
+    try:
+        for record in run_games(args.games, args.dark, args.light, args.seed, args.max_plies, args.workers):
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    seconds = time.perf_counter() - started
+    print(f"{count} games in {seconds:.2f}s ({count / seconds:.1f} games/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# tablebase.py
+# Win/loss/draw endgame tables built by retrograde analysis with BitboardRulesEngine, so
+# they follow CheckersRulesEngine exactly: mandatory capture, maximal jump paths, men
+# crowned on the far row.
+#
+# Positions are grouped into slices by material (dark men, dark kings, light men, light
+# kings). Inside a slice every position has its own index, a perfect hash: each group of
+# pieces is ranked as a combination of the squares it may stand on (men never stand on
+# their own promotion row), the ranks are mixed like digits of a number, and the side to
+# move is the lowest digit. Indexes whose groups overlap are not positions and stay 0.
+#
+# File layout: header, one directory entry per slice, then 2 bits per index, four
+# indexes per byte, low bits first. Tablebase maps the file read-only, so every process
+# probing it shares the page cache copy and nothing is read in up front.
+import argparse
+import mmap
+import struct
+import sys
+import time
+from array import array
+from itertools import combinations, product
+from math import comb
+
+from bitboard import NUM_SQUARES
+from pieces import COLOR_CODES, opponent
+from position_format import parse_fen
+from rules_engine import BitboardRulesEngine
+
+UNKNOWN, WIN, LOSS, DRAW = 0, 1, 2, 3  # WIN and LOSS are for the side to move
+RESULT_NAMES = {WIN: 'win', LOSS: 'loss', DRAW: 'draw'}
+FLIPPED = {WIN: LOSS, LOSS: WIN, DRAW: DRAW}
+
+MAGIC = b'CKTB'
+VERSION = 1
+HEADER = struct.Struct('<4sII')  # magic, version, slice count
+ENTRY = struct.Struct('<4BQ')    # dark men, dark kings, light men, light kings, data offset
+
+# Squares each group may stand on: dark men, dark kings, light men, light kings.
+KING_SQUARES = tuple(range(NUM_SQUARES))
+GROUP_SQUARES = (tuple(range(NUM_SQUARES - 4)), KING_SQUARES, tuple(range(4, NUM_SQUARES)), KING_SQUARES)
+# GROUP_POSITIONS[group][sq] is the square's place in GROUP_SQUARES[group].
+GROUP_POSITIONS = [{sq: place for place, sq in enumerate(squares)} for squares in GROUP_SQUARES]
+GROUP_MASKS = tuple(sum(1 << sq for sq in squares) for squares in GROUP_SQUARES)
+
+
+def material(dark, light, kings):
+    return ((dark & ~kings).bit_count(), (dark & kings).bit_count(),
+            (light & ~kings).bit_count(), (light & kings).bit_count())
+
+
+def slice_size(signature):
+    size = 2
+    for squares, count in zip(GROUP_SQUARES, signature):
+        size *= comb(len(squares), count)
+    return size
+
+
+def rank_group(group, mask):
+    # Colex rank of the combination: sum of C(place, i) over the i-th lowest square.
+    places = GROUP_POSITIONS[group]
+    rank = 0
+    i = 1
+    while mask:
+        low = mask & -mask
+        mask ^= low
+        rank += comb(places[low.bit_length() - 1], i)
+        i += 1
+    return rank
+
+
+def position_index(signature, dark, light, kings, color):
+    index = 0
+    masks = (dark & ~kings, dark & kings, light & ~kings, light & kings)
+    for group, (mask, count) in enumerate(zip(masks, signature)):
+        index = index * comb(len(GROUP_SQUARES[group]), count) + rank_group(group, mask)
+    return index * 2 + COLOR_CODES[color]
+
+
+def slice_signatures(max_pieces):
+    """
+    Every material split with both sides on the board, in an order where each slice only
+    depends on earlier ones: captures lower the piece count, crowning lowers the men count.
+    """
+    signatures = []
+    for total in range(2, max_pieces + 1):
+        for signature in product(range(total + 1), repeat=4):
+            dark_men, dark_kings, light_men, light_kings = signature
+            if sum(signature) == total and dark_men + dark_kings and light_men + light_kings:
+                signatures.append(signature)
+    return sorted(signatures, key=lambda signature: (sum(signature), signature[0] + signature[2]))
+
+
+def _group_masks(group, count):
+    # (rank, mask) for every placement of count pieces of one group.
+    squares = GROUP_SQUARES[group]
+    placements = []
+    for places in combinations(range(len(squares)), count):
+        mask = 0
+        for place in places:
+            mask |= 1 << squares[place]
+        placements.append((sum(comb(place, i + 1) for i, place in enumerate(places)), mask))
+    return placements
+
+
+def solve_slice(signature, solved, rules_engine):
+    """
+    Returns one byte per index of the slice. solved maps every earlier signature to its
+    values; positions that can only reach each other and never a decided one are draws.
+    """
+    size = slice_size(signature)
+    values = bytearray(size)
+    best = bytearray(size)            # best result reached outside the undecided children
+    waiting = array('H', bytes(2 * size))  # children in this slice not decided yet
+    parents, children = array('I'), array('I')
+    decided = []
+    sizes = [comb(len(squares), count) for squares, count in zip(GROUP_SQUARES, signature)]
+
+    for (r0, dark_men), (r1, dark_kings), (r2, light_men), (r3, light_kings) in product(
+            *(_group_masks(group, count) for group, count in enumerate(signature))):
+        dark, light = dark_men | dark_kings, light_men | light_kings
+        if dark & light or dark_men & dark_kings or light_men & light_kings:
+            continue
+        kings = dark_kings | light_kings
+        base = (((r0 * sizes[1] + r1) * sizes[2] + r2) * sizes[3] + r3) * 2
+        for color in ('dark', 'light'):
+            index = base + COLOR_CODES[color]
+            result = LOSS
+            for move in rules_engine.generate_moves(dark, light, kings, color):
+                child = rules_engine.apply_move(dark, light, kings, color, move)
+                child_signature = material(*child)
+                if not (child_signature[2] + child_signature[3] if color == 'dark'
+                        else child_signature[0] + child_signature[1]):
+                    result = WIN  # took the last enemy piece
+                    break
+                if child_signature == signature:
+                    parents.append(index)
+                    children.append(position_index(signature, *child, opponent(color)))
+                    waiting[index] += 1
+                    continue
+                child_values = solved[child_signature]
+                outcome = FLIPPED[child_values[position_index(child_signature, *child, opponent(color))]]
+                if outcome == WIN:
+                    result = WIN
+                    break
+                if outcome == DRAW:
+                    result = DRAW
+            if result == WIN or not waiting[index]:
+                values[index] = result
+                decided.append(index)
+            else:
+                best[index] = result
+
+    # Parents of every child, grouped by child (counting sort of the edge list).
+    starts = array('I', bytes(4 * (size + 1)))
+    for child in children:
+        starts[child + 1] += 1
+    for index in range(size):
+        starts[index + 1] += starts[index]
+    filled = array('I', starts)
+    grouped = array('I', bytes(4 * len(children)))
+    for parent, child in zip(parents, children):
+        grouped[filled[child]] = parent
+        filled[child] += 1
+    del parents, children, filled
+
+    # Retrograde propagation: a loss makes every parent a win, a parent whose children are
+    # all decided takes the best result left to it.
+    while decided:
+        child = decided.pop()
+        outcome = FLIPPED[values[child]]
+        for parent in grouped[starts[child]:starts[child + 1]]:
+            if values[parent]:
+                continue
+            if outcome == WIN:
+                values[parent] = WIN
+                decided.append(parent)
+                continue
+            if outcome == DRAW:
+                best[parent] = DRAW
+            waiting[parent] -= 1
+            if not waiting[parent]:
+                values[parent] = best[parent]
+                decided.append(parent)
+
+    for index in range(size):
+        if waiting[index] and not values[index]:
+            values[index] = DRAW
+    return values
+
+
+def pack_values(values):
+    packed = bytearray((len(values) + 3) // 4)
+    for index, value in enumerate(values):
+        if value:
+            packed[index >> 2] |= value << ((index & 3) << 1)
+    return packed
+
+
+def build(path, max_pieces, rules_engine=None, progress=None):
+    """Solves every slice up to max_pieces and writes the table to path."""
+    rules_engine = rules_engine or BitboardRulesEngine()
+    signatures = slice_signatures(max_pieces)
+    solved, packed = {}, []
+    for signature in signatures:
+        started = time.perf_counter()
+        solved[signature] = solve_slice(signature, solved, rules_engine)
+        packed.append(pack_values(solved[signature]))
+        if progress:
+            progress(signature, solved[signature], time.perf_counter() - started)
+
+    offset = HEADER.size + ENTRY.size * len(signatures)
+    with open(path, 'wb') as out:
+        out.write(HEADER.pack(MAGIC, VERSION, len(signatures)))
+        for signature, data in zip(signatures, packed):
+            out.write(ENTRY.pack(*signature, offset))
+            offset += len(data)
+        for data in packed:
+            out.write(data)
+
+
+class Tablebase:
+    """Read-only, memory-mapped view of a file written by build()."""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} tablebase")
+        self.offsets = {}
+        for i in range(count):
+            *signature, offset = ENTRY.unpack_from(self.data, HEADER.size + i * ENTRY.size)
+            self.offsets[tuple(signature)] = offset
+        self.max_pieces = max(map(sum, self.offsets), default=0)
+
+    def probe(self, dark, light, kings, color):
+        """WIN, LOSS or DRAW for the side to move, or None when the material is not in the table."""
+        signature = material(dark, light, kings)
+        offset = self.offsets.get(signature)
+        if offset is None:
+            return None
+        # A man on its own crowning row can be set up but never reached, so it has no index.
+        if dark & ~kings & ~GROUP_MASKS[0] or light & ~kings & ~GROUP_MASKS[2]:
+            return None
+        index = position_index(signature, dark, light, kings, color)
+        return self.data[offset + (index >> 2)] >> ((index & 3) << 1) & 3 or None
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or probe the endgame tablebase")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build')
+    build_parser.add_argument('--pieces', type=int, default=4)
+    build_parser.add_argument('--out', default='endgame.tb')
+    probe_parser = commands.add_parser('probe')
+    probe_parser.add_argument('fen', nargs='+')
+    probe_parser.add_argument('--table', default='endgame.tb')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        def progress(signature, values, seconds):
+            counts = [values.count(result) for result in (WIN, LOSS, DRAW)]
+            print(f"{signature}: {sum(counts)} positions, win {counts[0]} loss {counts[1]} "
+                  f"draw {counts[2]} ({seconds:.1f}s)", file=sys.stderr)
+
+        started = time.perf_counter()
+        build(args.out, args.pieces, progress=progress)
+        print(f"wrote {args.out} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    else:
+        table = Tablebase(args.table)
+        for fen in args.fen:
+            result = table.probe(*parse_fen(fen))
+            print(f"{fen}: {RESULT_NAMES.get(result, 'not in table')}")
+        table.close()
+
+
+if __name__ == "__main__":
+    main()
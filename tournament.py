@@ -0,0 +1,251 @@
+# tournament.py
+# Head-to-head match between two player configurations, for regression testing.
+#
+# Every opening is played twice with colours swapped, games run in a process pool and
+# each finished game is appended to a JSONL file straight away. After every game a
+# sequential probability ratio test decides whether the result is already clear:
+# H0 "A is elo0 stronger than B" against H1 "A is elo1 stronger than B".
+#
+# A configuration is a selfplay.py spec, optionally followed by '@classic' or '@bitboard'
+# to choose the rules engine it searches with, e.g. 'engine:4@classic'.
+import argparse
+import json
+import math
+import random
+import sys
+import time
+
+from bitboard import DARK_START, LIGHT_START, SQUARE_POS, BitBoard
+from notation import format_move, parse_move
+from piece_factory import PieceFactory
+from pieces import opponent
+from rules_engine import BitboardRulesEngine, CheckersRulesEngine
+from selfplay import HeadlessMatch, make_player
+from worker_pool import map_unordered
+
+RULES_ENGINES = {'bitboard': BitboardRulesEngine, 'classic': CheckersRulesEngine}
+
+
+class TimedPlayer:
+    """Wraps a player to add up its thinking time, moves made and nodes searched."""
+
+    def __init__(self, player):
+        self.player = player
+        self.moves = 0
+        self.seconds = 0.0
+        self.nodes = 0
+
+    def __getattr__(self, name):
+        return getattr(self.player, name)
+
+    def get_move(self, board, ui_adapter):
+        started = time.perf_counter()
+        move = self.player.get_move(board, ui_adapter)
+        self.seconds += time.perf_counter() - started
+        self.moves += 1
+        searcher = getattr(self.player, 'searcher', None)
+        if searcher is not None:
+            self.nodes += searcher.nodes
+        else:
+            self.nodes += getattr(self.player, 'last_playouts', 0)
+        return move
+
+    def stats(self):
+        return {'moves': self.moves, 'seconds': round(self.seconds, 6), 'nodes': self.nodes}
+
+
+def make_openings(count, plies, seed=0):
+    """count distinct random legal move sequences of the given length from the start."""
+    rules_engine = BitboardRulesEngine()
+    rng = random.Random(seed)
+    openings = []
+    for _ in range(50 * count):
+        if len(openings) == count:
+            break
+        dark, light, kings, color = DARK_START, LIGHT_START, 0, 'light'
+        moves = []
+        for _ in range(plies):
+            legal = rules_engine.generate_moves(dark, light, kings, color)
+            if not legal:
+                break
+            move = rng.choice(legal)
+            src, path, _ = move
+            moves.append(format_move(SQUARE_POS[src], [SQUARE_POS[sq] for sq in path]))
+            dark, light, kings = rules_engine.apply_move(dark, light, kings, color, move)
+            color = opponent(color)
+        if len(moves) == plies and moves not in openings:
+            openings.append(moves)
+    return openings
+
+
+def build_player(config, color, seed):
+    spec, _, engine_name = config.partition('@')
+    return TimedPlayer(make_player(spec, color, RULES_ENGINES[engine_name or 'bitboard'](), seed))
+
+
+def play_game(game_id, opening, dark_config, light_config, seed, max_plies):
+    board = BitBoard(BitboardRulesEngine(), PieceFactory())
+    players = [build_player(dark_config, 'dark', seed), build_player(light_config, 'light', seed + 1)]
+    match = HeadlessMatch(board, players)
+    for text in opening:
+        start, path = parse_move(text)
+        piece = board.get_piece_at(start)
+        for dest in path:
+            board.move_piece(piece, dest)
+        match.switch_turn()
+    result, moves = match.play(max_plies)
+    return {
+        'game': game_id,
+        'opening': opening,
+        'dark': dark_config,
+        'light': light_config,
+        'result': result,
+        'plies': len(opening) + len(moves),
+        'stats': {'dark': players[0].stats(), 'light': players[1].stats()},
+    }
+
+
+def expected_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_estimate(wins, draws, losses):
+    """
+    (Elo difference, 95% error margin) of the side that scored wins/draws/losses. The
+    margin is infinite until the results differ: identical results show no spread.
+    """
+    games = wins + draws + losses
+    if not games:
+        return 0.0, math.inf
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+
+    def elo(s):
+        s = min(max(s, 1e-6), 1 - 1e-6)
+        return -400 * math.log10(1 / s - 1)
+
+    if wins == games or draws == games or losses == games:
+        return elo(score), math.inf
+    margin = 1.96 * math.sqrt(variance / games)
+    return elo(score), (elo(score + margin) - elo(score - margin)) / 2
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    # Log-likelihood ratio of H1 against H0, normal approximation of the trinomial.
+    games = wins + draws + losses
+    if not games:
+        return 0.0
+    if wins == games or draws == games or losses == games:
+        # No spread to measure yet: count half a win and half a loss extra.
+        wins, losses, games = wins + 0.5, losses + 0.5, games + 1
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    s0, s1 = expected_score(elo0), expected_score(elo1)
+    return (s1 - s0) * (2 * score - s0 - s1) * games / (2 * variance)
+
+
+def sprt_bounds(alpha, beta):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+class Tally:
+    """Results from configuration A's side, plus per-configuration speed."""
+
+    def __init__(self, a_config, b_config):
+        self.configs = (a_config, b_config)
+        self.wins = self.draws = self.losses = 0
+        self.speed = [{'moves': 0, 'seconds': 0.0, 'nodes': 0} for _ in self.configs]
+
+    def add(self, record):
+        # Even games have A on dark, odd games on light.
+        a_color = 'dark' if record['game'] % 2 == 0 else 'light'
+        if record['result'] == 'draw':
+            self.draws += 1
+        elif record['result'] == a_color:
+            self.wins += 1
+        else:
+            self.losses += 1
+        for index, color in enumerate((a_color, opponent(a_color))):
+            totals = self.speed[index]
+            for key, value in record['stats'][color].items():
+                totals[key] += value
+
+    def report(self):
+        elo, margin = elo_estimate(self.wins, self.draws, self.losses)
+        margin = 'unbounded' if math.isinf(margin) else f"{margin:.1f}"
+        lines = [f"{self.configs[0]} vs {self.configs[1]}: +{self.wins} ={self.draws} -{self.losses}, "
+                 f"Elo {elo:+.1f} +/- {margin}"]
+        for config, totals in zip(self.configs, self.speed):
+            seconds, moves = totals['seconds'], totals['moves']
+            lines.append(f"  {config:24s} {totals['nodes'] / seconds if seconds else 0:10.0f} nodes/s  "
+                         f"{1000 * seconds / moves if moves else 0:8.2f} ms/move")
+        return '\n'.join(lines)
+
+
+def run_tournament(a_config, b_config, openings, out, workers=1, max_plies=300, seed=0,
+                   elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05, progress=None):
+    """
+    Plays every opening twice (A dark, then A light) until the openings run out or the
+    SPRT accepts a hypothesis. Returns (tally, 'H0', 'H1' or None).
+    """
+    games = [(game_id, opening, *((a_config, b_config) if game_id % 2 == 0 else (b_config, a_config)))
+             for game_id, opening in enumerate(opening for opening in openings for _ in range(2))]
+    lower, upper = sprt_bounds(alpha, beta)
+    tally = Tally(a_config, b_config)
+    decision = None
+    results = map_unordered(play_game, ((*game, seed + 2 * game[0], max_plies) for game in games), workers)
+    try:
+        for record in results:
+            tally.add(record)
+            llr = sprt_llr(tally.wins, tally.draws, tally.losses, elo0, elo1)
+            record['llr'] = round(llr, 4)
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            if progress:
+                progress(tally, llr)
+            if llr <= lower:
+                decision = 'H0'
+            elif llr >= upper:
+                decision = 'H1'
+            if decision is not None:
+                break
+    finally:
+        results.close()  # cancels the games still waiting to start
+    return tally, decision
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="A vs B match with colour-swapped openings and SPRT")
+    parser.add_argument('--a', default='engine:4', help="configuration under test")
+    parser.add_argument('--b', default='engine:3', help="baseline configuration")
+    parser.add_argument('--openings', type=int, default=100, help="each one is played twice")
+    parser.add_argument('--opening-plies', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--max-plies', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--elo0', type=float, default=0.0)
+    parser.add_argument('--elo1', type=float, default=10.0)
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--beta', type=float, default=0.05)
+    parser.add_argument('--out', default='tournament.jsonl')
+    args = parser.parse_args(argv)
+
+    def progress(tally, llr):
+        games = tally.wins + tally.draws + tally.losses
+        print(f"\rgame {games}: +{tally.wins} ={tally.draws} -{tally.losses}  LLR {llr:+.2f}",
+              end='', file=sys.stderr)
+
+    openings = make_openings(args.openings, args.opening_plies, args.seed)
+    started = time.perf_counter()
+    with open(args.out, 'a') as out:
+        tally, decision = run_tournament(args.a, args.b, openings, out, args.workers, args.max_plies,
+                                         args.seed, args.elo0, args.elo1, args.alpha, args.beta, progress)
+    print(file=sys.stderr)
+    print(tally.report())
+    lower, upper = sprt_bounds(args.alpha, args.beta)
+    print(f"SPRT elo0={args.elo0} elo1={args.elo1} bounds [{lower:.2f}, {upper:.2f}]: "
+          f"{decision or 'inconclusive'} after {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# transposition_table.py
+# A fixed-size hash table keyed by Zobrist keys, shared by search, perft and analysis.
+import threading
+
+EXACT, LOWER_BOUND, UPPER_BOUND = range(3)
+
+
+class TranspositionTable:
+    """
+    One entry per slot, the slot being the low bits of the key. A stored entry is kept
+    against a newcomer only while it is from the current search and was searched deeper,
+    so old generations age out and shallow results never push out expensive ones.
+    """
+
+    def __init__(self, size_bits=20):
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.clear()
+
+    def clear(self):
+        self.keys = [0] * self.size
+        self.entries = [None] * self.size  # (depth, value, flag, move, generation)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def probe(self, key):
+        slot = key & self.mask
+        if self.keys[slot] == key:
+            entry = self.entries[slot]
+            if entry is not None:
+                self.hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, flag=EXACT, move=None):
+        slot = key & self.mask
+        old = self.entries[slot]
+        if old is not None and self.keys[slot] != key:
+            if old[4] == self.generation and old[0] > depth:
+                return
+            self.overwrites += 1
+        self.keys[slot] = key
+        self.entries[slot] = (depth, value, flag, move, self.generation)
+        self.stores += 1
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            'size': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'stores': self.stores,
+            'overwrites': self.overwrites,
+        }
+
+
+class ThreadTables:
+    """
+    A TranspositionTable per thread behind the same probe/store interface, made on a
+    thread's first use. Searchers that run on a thread pool share these, so memory grows
+    with the threads rather than with the searchers.
+    """
+
+    def __init__(self, size_bits=16):
+        self.size_bits = size_bits
+        self.local = threading.local()
+
+    @property
+    def table(self):
+        table = getattr(self.local, 'table', None)
+        if table is None:
+            table = self.local.table = TranspositionTable(self.size_bits)
+        return table
+
+    def new_search(self):
+        self.table.new_search()
+
+    def probe(self, key):
+        return self.table.probe(key)
+
+    def store(self, key, depth, value, flag=EXACT, move=None):
+        self.table.store(key, depth, value, flag, move)
+
+    def stats(self):
+        return self.table.stats()
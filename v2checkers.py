@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from move_tables import JUMPS, NEIGHBORS, PROMOTION_ROW
 
 class Piece(ABC):
     def __init__(self, color, position):
@@ -70,7 +71,7 @@ class Board:
         piece.position = (end_row, end_col)
         self.grid[end_row][end_col] = piece
 
-        if (piece.color == 'light' and end_row == 0) or (piece.color == 'dark' and end_row == 7):
+        if end_row == PROMOTION_ROW[piece.color]:
             piece.make_king()
 
         if abs(end_row - start_row) == 2:
@@ -84,14 +85,7 @@ class Board:
         return self.get_all_captures(piece) or self.get_simple_moves(piece)
 
     def get_simple_moves(self, piece):
-        moves = []
-        directions = piece.get_directions()
-        row, col = piece.position
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            if self.in_bounds((r, c)) and self.grid[r][c] is None:
-                moves.append((r, c))
-        return moves
+        return [(r, c) for r, c in NEIGHBORS[(piece.color, piece.is_king)][piece.position] if self.grid[r][c] is None]
 
     def get_all_captures(self, piece, position=None, visited=None):
         if visited is None:
@@ -100,26 +94,19 @@ class Board:
             position = piece.position
 
         captures = []
-        row, col = position
-        directions = piece.get_directions()
-
-        for dr, dc in directions:
-            mid_r, mid_c = row + dr, col + dc
-            end_r, end_c = row + 2*dr, col + 2*dc
-            if not self.in_bounds((end_r, end_c)) or not self.in_bounds((mid_r, mid_c)):
-                continue
-            enemy = self.grid[mid_r][mid_c]
-            if enemy and enemy.color != piece.color and self.grid[end_r][end_c] is None and (mid_r, mid_c) not in visited:
-                next_visited = visited.copy()
-                next_visited.add((mid_r, mid_c))
-                next_captures = self.get_all_captures(piece, (end_r, end_c), next_visited)
+        for mid, end in JUMPS[(piece.color, piece.is_king)][position]:
+            enemy = self.grid[mid[0]][mid[1]]
+            if enemy and enemy.color != piece.color and self.grid[end[0]][end[1]] is None and mid not in visited:
+                visited.add(mid)
+                next_captures = self.get_all_captures(piece, end, visited)
+                visited.discard(mid)
                 if next_captures:
                     for path in next_captures:
-                        captures.append([(end_r, end_c)] + path)
+                        captures.append([end] + path)
                 else:
-                    captures.append([(end_r, end_c)])
+                    captures.append([end])
 
-        return [path for path in captures] if captures else []
+        return captures
 
     def in_bounds(self, pos):
         r, c = pos
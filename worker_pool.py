@@ -0,0 +1,35 @@
+# worker_pool.py
+# The batch runners' process pool: selfplay.py, tournament.py and game_archive.py hand it
+# a function and a stream of argument tuples, and read results back as they finish.
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+def map_unordered(function, jobs, workers=1):
+    """
+    Yields function(*args) for every args in jobs, in the order they finish. With more than
+    one worker at most 2 * workers jobs are in flight, so jobs may be an endless generator.
+    Closing the generator early cancels the jobs not yet started.
+    """
+    jobs = iter(jobs)
+    if workers <= 1:
+        for args in jobs:
+            yield function(*args)
+        return
+
+    executor = ProcessPoolExecutor(workers)
+    try:
+        pending = set()
+        exhausted = False
+        while not exhausted or pending:
+            while not exhausted and len(pending) < 2 * workers:
+                args = next(jobs, None)
+                if args is None:
+                    exhausted = True
+                else:
+                    pending.add(executor.submit(function, *args))
+            if pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
@@ -0,0 +1,33 @@
+# zobrist.py
+# 64-bit Zobrist keys. The generator is seeded with a constant so that every process,
+# and every file written by one (books, tablebases), agrees on the same keys.
+import random
+
+NUM_SQUARES = 32
+
+_rng = random.Random(0x5EED)
+
+# (color, is_king) -> one key per square number
+PIECE_KEYS = {
+    (color, is_king): [_rng.getrandbits(64) for _ in range(NUM_SQUARES)]
+    for color in ('dark', 'light') for is_king in (False, True)
+}
+SIDE_KEY = _rng.getrandbits(64)  # present while dark is to move
+
+
+def piece_keys(num_squares):
+    """PIECE_KEYS for a board with another number of squares, from its own fixed seed."""
+    if num_squares == NUM_SQUARES:
+        return PIECE_KEYS
+    rng = random.Random(0x5EED + num_squares)
+    return {(color, is_king): [rng.getrandbits(64) for _ in range(num_squares)]
+            for color in ('dark', 'light') for is_king in (False, True)}
+
+
+def hash_masks(dark, light, kings, color='light'):
+    key = SIDE_KEY if color == 'dark' else 0
+    for color_name, mask in (('dark', dark), ('light', light)):
+        for sq in range(NUM_SQUARES):
+            if mask >> sq & 1:
+                key ^= PIECE_KEYS[(color_name, bool(kings >> sq & 1))][sq]
+    return key